@@ -0,0 +1,178 @@
+# backend/assets.py
+"""
+Static asset pipeline for /modules.
+
+At startup every file under modules/ is hashed, small files are kept in memory
+together with a gzip variant, and local href/src references inside HTML are
+rewritten to content-hashed URLs (/modules/x/y.css?v=<hash>). Hashed URLs are
+served with an immutable Cache-Control; everything else revalidates via ETag.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+# ===== Settings =====
+ASSET_MEMORY_MAX_BYTES = int(os.getenv("ASSET_MEMORY_MAX_BYTES", str(256 * 1024)))
+# Re-read files that changed on disk (handy in development)
+ASSET_WATCH = os.getenv("ASSET_WATCH", "1" if os.getenv("ENV", "development") == "development" else "0") == "1"
+
+URL_PREFIX = "/modules/"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+HTML_REF_RE = re.compile(r'(?P<attr>\b(?:href|src))="(?P<url>[^"#?:]+)"')
+
+
+@dataclass
+class Asset:
+    rel_path: str
+    file_path: str
+    content_type: str
+    digest: str
+    mtime: float
+    body: Optional[bytes] = None  # None: too big, served from disk
+    gzip_body: Optional[bytes] = None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+    @property
+    def gzip_etag(self) -> str:
+        return f'"{self.digest}-gz"'
+
+    @property
+    def url(self) -> str:
+        return f"{URL_PREFIX}{self.rel_path}?v={self.digest}"
+
+
+def _content_type(path: str) -> str:
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type == "application/javascript":
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class AssetStore:
+    def __init__(self, root: str, memory_max_bytes: int = ASSET_MEMORY_MAX_BYTES, watch: bool = ASSET_WATCH):
+        self.root = root
+        self.memory_max_bytes = memory_max_bytes
+        self.watch = watch
+        self._assets: Dict[str, Asset] = {}
+        self._built = False
+        self._lock = threading.Lock()
+
+    # ----- build -----
+    def build(self):
+        assets: Dict[str, Asset] = {}
+        html_files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                file_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(file_path, self.root).replace(os.sep, "/")
+                if rel_path.endswith(".html"):
+                    html_files.append((rel_path, file_path))
+                else:
+                    assets[rel_path] = self._load(rel_path, file_path)
+        # HTML last: its content (and hash) depends on the other assets' hashes
+        for rel_path, file_path in html_files:
+            assets[rel_path] = self._load(rel_path, file_path, assets)
+        with self._lock:
+            self._assets = assets
+            self._built = True
+
+    def _load(self, rel_path: str, file_path: str, assets: Optional[Dict[str, Asset]] = None) -> Asset:
+        stat = os.stat(file_path)
+        content_type = _content_type(file_path)
+        with open(file_path, "rb") as f:
+            data = f.read()
+        if assets is not None:
+            data = self._rewrite_html(rel_path, data, assets)
+
+        asset = Asset(rel_path, file_path, content_type, _digest(data), stat.st_mtime)
+        # Rewritten HTML only exists in memory, so it is always cached
+        if len(data) <= self.memory_max_bytes or assets is not None:
+            asset.body = data
+            if content_type.startswith(COMPRESSIBLE_TYPES):
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(compressed) < len(data):
+                    asset.gzip_body = compressed
+        return asset
+
+    def _rewrite_html(self, rel_path: str, data: bytes, assets: Dict[str, Asset]) -> bytes:
+        base_dir = posixpath.dirname(rel_path)
+
+        def replace(match):
+            url = match.group("url")
+            if url.startswith(URL_PREFIX):
+                target = url[len(URL_PREFIX):]
+            elif url.startswith("/"):
+                return match.group(0)
+            else:
+                target = posixpath.normpath(posixpath.join(base_dir, url))
+            asset = assets.get(target)
+            if asset is None:
+                return match.group(0)
+            return f'{match.group("attr")}="{asset.url}"'
+
+        return HTML_REF_RE.sub(replace, data.decode("utf-8")).encode("utf-8")
+
+    # ----- lookup -----
+    def needs_build(self, rel_path: str) -> bool:
+        """True before the first build, or (with watch on) when `rel_path` changed on disk."""
+        if not self._built:
+            return True
+        asset = self._assets.get(rel_path)
+        if asset is None or not self.watch:
+            return False
+        try:
+            return os.stat(asset.file_path).st_mtime != asset.mtime
+        except OSError:
+            return True
+
+    def get(self, rel_path: str) -> Optional[Asset]:
+        """Current asset for `rel_path`; call build() first when needs_build() says so."""
+        return self._assets.get(rel_path)
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+
+def asset_response(request: Request, asset: Asset) -> Response:
+    """
+    Serve an asset with ETag/304 handling, gzip when accepted, and immutable
+    caching when the request carries the current content hash (?v=).
+    """
+    immutable = request.query_params.get("v") == asset.digest
+    use_gzip = asset.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", "")
+    etag = asset.gzip_etag if use_gzip else asset.etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+    }
+    if asset.gzip_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    if asset.body is None:
+        return FileResponse(asset.file_path, media_type=asset.content_type, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(asset.gzip_body, media_type=asset.content_type, headers=headers)
+    return Response(asset.body, media_type=asset.content_type, headers=headers)
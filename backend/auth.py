@@ -0,0 +1,158 @@
+# backend/auth.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from backend.local_sqlite import LocalSqlite
+
+# ===== Settings =====
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+REVOKED_TOKEN_STORE = os.getenv("REVOKED_TOKEN_STORE", "memory")  # "memory" | "sqlite"
+# How often (seconds) a worker picks up logouts handled by other workers (sqlite store)
+REVOKED_SYNC_SECONDS = float(os.getenv("REVOKED_SYNC_SECONDS", "1"))
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REVOKED_DB_PATH = os.getenv("REVOKED_DB_PATH", os.path.join(BASE_DIR, "revoked.db"))
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    LRU of tokens whose signature was already verified, keyed by token digest.
+    An entry is dropped once its `exp` passes, so a cache hit never outlives the token.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str, now: Optional[float] = None) -> Optional[dict]:
+        now = time.time() if now is None else now
+        with self._lock:
+            payload = self._items.get(digest)
+            if payload is None:
+                return None
+            if payload.get("exp", 0) <= now:
+                del self._items[digest]
+                return None
+            self._items.move_to_end(digest)
+            return payload
+
+    def put(self, digest: str, payload: dict):
+        with self._lock:
+            self._items[digest] = payload
+            self._items.move_to_end(digest)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def discard(self, digest: str):
+        with self._lock:
+            self._items.pop(digest, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class RevokedTokens:
+    """
+    Server-side logout list: token digest -> exp.
+    Entries only need to live until the token would have expired anyway.
+    This one only knows about logouts handled by its own worker.
+    """
+
+    blocking = False  # see backend.local_sqlite
+
+    def __init__(self):
+        self._items: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_prune = 1024
+
+    def revoke(self, digest: str, exp: float):
+        with self._lock:
+            self._items[digest] = exp
+            if len(self._items) >= self._next_prune:
+                self._prune(time.time())
+
+    def is_revoked(self, digest: str) -> bool:
+        return digest in self._items
+
+    def needs_sync(self, now: Optional[float] = None) -> bool:
+        return False
+
+    def sync(self):
+        """Pick up revocations made by other workers."""
+
+    def _prune(self, now: float):
+        self._items = {d: exp for d, exp in self._items.items() if exp > now}
+        self._next_prune = max(1024, 2 * len(self._items))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+REVOKED_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS revoked ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " digest TEXT NOT NULL UNIQUE,"
+    " exp REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_revoked_exp ON revoked (exp)",
+)
+
+
+class SqliteRevokedTokens(RevokedTokens):
+    """
+    Logouts shared between uvicorn workers through a local SQLite file (same
+    idea as CAPTCHA_STORE / RATE_LIMIT_STORE). Lookups stay in-process: every
+    `sync_interval` seconds one request reads the rows added since the last
+    sync, so a logout in one worker takes effect in the others within that time.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str = REVOKED_DB_PATH, sync_interval: float = REVOKED_SYNC_SECONDS):
+        super().__init__()
+        self.sync_interval = sync_interval
+        self._last_seq = 0
+        self._synced_at = 0.0
+        self._sync_lock = threading.Lock()
+        self._db = LocalSqlite(path, REVOKED_SCHEMA)
+
+    def revoke(self, digest: str, exp: float):
+        super().revoke(digest, exp)
+        conn = self._db.conn()
+        conn.execute("INSERT OR IGNORE INTO revoked (digest, exp) VALUES (?, ?)", (digest, exp))
+        conn.execute("DELETE FROM revoked WHERE exp <= ?", (time.time(),))
+
+    def needs_sync(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return now - self._synced_at >= self.sync_interval
+
+    def sync(self):
+        with self._sync_lock:
+            if not self.needs_sync():
+                return  # another request synced while we waited
+            rows = self._db.conn().execute(
+                "SELECT seq, digest, exp FROM revoked WHERE seq > ? ORDER BY seq", (self._last_seq,)
+            ).fetchall()
+            with self._lock:
+                for seq, digest, exp in rows:
+                    self._items[digest] = exp
+                    self._last_seq = seq
+                if len(self._items) >= self._next_prune:
+                    self._prune(time.time())
+            self._synced_at = time.monotonic()
+
+
+def create_revoked_tokens(kind: str = REVOKED_TOKEN_STORE) -> RevokedTokens:
+    if kind == "sqlite":
+        return SqliteRevokedTokens()
+    if kind == "memory":
+        return RevokedTokens()
+    raise ValueError(f"Unknown REVOKED_TOKEN_STORE: {kind}")
@@ -0,0 +1,236 @@
+# backend/bulk_import.py
+"""
+Bulk user import (CSV or NDJSON).
+
+Per batch: one SELECT ... IN (...) to find existing usernames, passwords hashed
+in parallel on the hashing process pool, one executemany INSERT and one COMMIT.
+
+CLI (also how the first admin is created; /api/register only hands out "user"):
+    python -m backend.bulk_import users.csv
+    python -m backend.bulk_import users.ndjson --batch-size 1000 > report.ndjson
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import crud, models, search
+
+DEFAULT_BATCH_SIZE = 500
+USERNAME_MAX = models.User.__table__.c.username.type.length
+ROLE_MAX = models.User.__table__.c.role.type.length
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================
+# Parsing
+# ===========================
+def iter_csv_rows(fp: TextIO) -> Iterator[dict]:
+    """CSV with a header row: username,password[,role]."""
+    yield from csv.DictReader(fp)
+
+
+def iter_ndjson_rows(fp: TextIO) -> Iterator[dict]:
+    """One JSON object per line; blank lines are skipped."""
+    for line in fp:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = {"_error": "Invalid JSON"}
+        yield row if isinstance(row, dict) else {"_error": "Expected a JSON object"}
+
+
+def iter_rows(fp: TextIO, fmt: str) -> Iterator[dict]:
+    if fmt == "csv":
+        return iter_csv_rows(fp)
+    if fmt == "ndjson":
+        return iter_ndjson_rows(fp)
+    raise ValueError(f"Unknown import format: {fmt}")
+
+
+def _validate(row: dict) -> Optional[str]:
+    if row.get("_error"):
+        return row["_error"]
+    # NDJSON can carry numbers, lists, ...; CSV only ever gives str or None
+    for field in ("username", "password", "role"):
+        if row.get(field) is not None and not isinstance(row[field], str):
+            return f"{field.capitalize()} must be a string"
+    username = (row.get("username") or "").strip()
+    if not username:
+        return "Missing username"
+    if len(username) > USERNAME_MAX:
+        return f"Username longer than {USERNAME_MAX} characters"
+    if not row.get("password"):
+        return "Missing password"
+    if len(row.get("role") or "") > ROLE_MAX:
+        return f"Role longer than {ROLE_MAX} characters"
+    return None
+
+
+# ===========================
+# Import
+# ===========================
+async def _existing_usernames(db: AsyncSession, usernames: List[str]) -> set:
+    result = await db.execute(
+        select(models.User.username).where(models.User.username.in_(usernames))
+    )
+    return set(result.scalars())
+
+
+async def _existing_roles(db: AsyncSession, names: List[str]) -> set:
+    result = await db.execute(select(models.Role.name).where(models.Role.name.in_(names)))
+    return set(result.scalars())
+
+
+def _username(row: dict) -> str:
+    username = row.get("username")
+    return username.strip() if isinstance(username, str) else ""
+
+
+def _role(row: dict) -> str:
+    return (row.get("role") or "user").strip() or "user"
+
+
+async def _import_batch(db: AsyncSession, batch: List[tuple]) -> List[dict]:
+    """batch: list of (row_number, raw_row). Returns one result dict per row, in order."""
+    results: Dict[int, dict] = {}
+    candidates: Dict[str, tuple] = {}
+
+    for row_number, row in batch:
+        error = _validate(row)
+        username = _username(row)
+        if error:
+            results[row_number] = {"row": row_number, "username": username, "status": "invalid", "error": error}
+        elif username in candidates:
+            results[row_number] = {"row": row_number, "username": username, "status": "duplicate"}
+        else:
+            candidates[username] = (row_number, row)
+
+    # Roles must exist; an unknown name would otherwise grant nothing (or a future role's rights)
+    wanted = {_role(row) for _, row in candidates.values()}
+    known = await _existing_roles(db, list(wanted)) if wanted else set()
+    for username, (row_number, row) in list(candidates.items()):
+        if _role(row) not in known:
+            del candidates[username]
+            results[row_number] = {"row": row_number, "username": username, "status": "invalid",
+                                   "error": f"Unknown role '{_role(row)}'"}
+
+    existing = await _existing_usernames(db, list(candidates)) if candidates else set()
+    for username in existing:
+        row_number, _ = candidates.pop(username)
+        results[row_number] = {"row": row_number, "username": username, "status": "exists"}
+
+    if candidates:
+        usernames = list(candidates)
+        hashes = await crud.hash_passwords([candidates[u][1]["password"] for u in usernames])
+        values = [
+            {
+                "username": u,
+                "hashed_password": h,
+                "role": _role(candidates[u][1]),
+            }
+            for u, h in zip(usernames, hashes)
+        ]
+        try:
+            await db.execute(insert(models.User), values)
+            await db.commit()
+        except IntegrityError:
+            # Someone else inserted some of these meanwhile: drop them and retry once
+            await db.rollback()
+            taken = await _existing_usernames(db, usernames)
+            for username in taken:
+                row_number, _ = candidates.pop(username)
+                results[row_number] = {"row": row_number, "username": username, "status": "exists"}
+            values = [v for v in values if v["username"] not in taken]
+            if values:
+                await db.execute(insert(models.User), values)
+                await db.commit()
+        for username, (row_number, _) in candidates.items():
+            results[row_number] = {"row": row_number, "username": username, "status": "created"}
+        if search.SEARCH_INDEX_ENABLED and candidates:
+            created = await db.execute(
+                select(*crud.USER_LIST_COLUMNS).where(models.User.username.in_(list(candidates)))
+            )
+            for row in created.mappings():
+                search.index_user(row["id"], row["username"], row["role"])
+
+    return [results[row_number] for row_number, _ in batch]
+
+
+async def _import_batch_or_fail(db: AsyncSession, batch: List[tuple]) -> List[dict]:
+    """Like _import_batch, but a batch that blows up reports an error per row instead of
+    ending the stream; later batches still run."""
+    try:
+        return await _import_batch(db, batch)
+    except Exception:
+        logger.exception("Bulk import batch of rows %d-%d failed", batch[0][0], batch[-1][0])
+        await db.rollback()
+        return [
+            {"row": row_number, "username": _username(row), "status": "error", "error": "Batch failed"}
+            for row_number, row in batch
+        ]
+
+
+async def import_users(
+    db: AsyncSession, rows: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE
+) -> AsyncIterator[dict]:
+    """Import rows batch by batch, yielding a result dict per input row."""
+    batch: List[tuple] = []
+    for row_number, row in enumerate(rows, start=1):
+        batch.append((row_number, row))
+        if len(batch) >= batch_size:
+            for result in await _import_batch_or_fail(db, batch):
+                yield result
+            batch = []
+    if batch:
+        for result in await _import_batch_or_fail(db, batch):
+            yield result
+
+
+# ===========================
+# CLI
+# ===========================
+async def _main(path: str, fmt: str, batch_size: int) -> Dict[str, int]:
+    from backend.database import AsyncSessionLocal, dispose_engines
+
+    counts: Dict[str, int] = {}
+    # No logins share the pool here: hash on every worker
+    crud.PASSWORD_HASH_BULK_JOBS = crud.PASSWORD_HASH_WORKERS
+    try:
+        with open(path, newline="", encoding="utf-8") as fp:
+            async with AsyncSessionLocal() as db:
+                async for result in import_users(db, iter_rows(fp, fmt), batch_size):
+                    counts[result["status"]] = counts.get(result["status"], 0) + 1
+                    sys.stdout.write(json.dumps(result) + "\n")
+    finally:
+        crud.shutdown_hash_executor()
+        await dispose_engines()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None,
+                        help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    counts = asyncio.run(_main(args.path, fmt, args.batch_size))
+    print(json.dumps(counts), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
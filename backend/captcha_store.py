@@ -0,0 +1,144 @@
+# backend/captcha_store.py
+import heapq
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from backend.local_sqlite import LocalSqlite
+
+# ===== Settings =====
+CAPTCHA_STORE = os.getenv("CAPTCHA_STORE", "memory")  # "memory" | "sqlite"
+CAPTCHA_TTL = int(os.getenv("CAPTCHA_TTL", "300"))  # seconds
+CAPTCHA_MAX_ENTRIES = int(os.getenv("CAPTCHA_MAX_ENTRIES", "100000"))
+CAPTCHA_SWEEP_INTERVAL = float(os.getenv("CAPTCHA_SWEEP_INTERVAL", "30"))
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAPTCHA_DB_PATH = os.getenv("CAPTCHA_DB_PATH", os.path.join(BASE_DIR, "captcha.db"))
+
+
+class CaptchaStore:
+    """
+    Interface for captcha storage.
+    Entries are one-shot: `pop` removes the captcha whether or not it is still valid.
+    """
+
+    blocking = False  # see backend.local_sqlite
+
+    def put(self, cid: str, word: str, expiry: float):
+        raise NotImplementedError
+
+    def pop(self, cid: str) -> Optional[Tuple[str, float]]:
+        raise NotImplementedError
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove expired entries, return how many were removed."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+# ===========================
+# In-process store (single worker)
+# ===========================
+class MemoryCaptchaStore(CaptchaStore):
+    """
+    Dict + min-heap on expiry.
+    The heap gives O(log n) expiry and oldest-first eviction when the cap is hit.
+    Consumed ids stay in the heap until they expire or the heap is compacted.
+    """
+
+    def __init__(self, max_entries: int = CAPTCHA_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._items: Dict[str, Tuple[str, float]] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def put(self, cid: str, word: str, expiry: float):
+        with self._lock:
+            while len(self._items) >= self.max_entries and self._heap:
+                _, old_cid = heapq.heappop(self._heap)
+                self._items.pop(old_cid, None)
+            self._items[cid] = (word, expiry)
+            heapq.heappush(self._heap, (expiry, cid))
+            # Drop stale heap entries left behind by consumed captchas
+            if len(self._heap) > 2 * self.max_entries:
+                self._heap = [(exp, c) for exp, c in self._heap if c in self._items]
+                heapq.heapify(self._heap)
+
+    def pop(self, cid: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            return self._items.pop(cid, None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, cid = heapq.heappop(self._heap)
+                item = self._items.get(cid)
+                if item is not None and item[1] <= now:
+                    del self._items[cid]
+                    removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# ===========================
+# Shared SQLite store (multiple uvicorn workers)
+# ===========================
+CAPTCHA_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS captchas ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " cid TEXT NOT NULL UNIQUE,"
+    " word TEXT NOT NULL,"
+    " expires REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_captchas_expires ON captchas (expires)",
+)
+
+
+class SqliteCaptchaStore(CaptchaStore):
+    """
+    Captchas in a local SQLite file so every worker process sees the same set.
+    `seq` is monotonic, so the hard cap is a primary-key range delete and
+    expiry uses the index on `expires`.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str = CAPTCHA_DB_PATH, max_entries: int = CAPTCHA_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._db = LocalSqlite(path, CAPTCHA_SCHEMA)
+
+    def put(self, cid: str, word: str, expiry: float):
+        conn = self._db.conn()
+        cur = conn.execute(
+            "INSERT INTO captchas (cid, word, expires) VALUES (?, ?, ?)", (cid, word, expiry)
+        )
+        # Evict oldest rows beyond the cap
+        conn.execute("DELETE FROM captchas WHERE seq <= ?", (cur.lastrowid - self.max_entries,))
+
+    def pop(self, cid: str) -> Optional[Tuple[str, float]]:
+        row = self._db.conn().execute(
+            "DELETE FROM captchas WHERE cid = ? RETURNING word, expires", (cid,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        cur = self._db.conn().execute("DELETE FROM captchas WHERE expires <= ?", (now,))
+        return cur.rowcount
+
+    def __len__(self) -> int:
+        return self._db.conn().execute("SELECT COUNT(*) FROM captchas").fetchone()[0]
+
+
+def create_captcha_store(kind: str = CAPTCHA_STORE) -> CaptchaStore:
+    if kind == "sqlite":
+        return SqliteCaptchaStore()
+    if kind == "memory":
+        return MemoryCaptchaStore()
+    raise ValueError(f"Unknown CAPTCHA_STORE: {kind}")
@@ -1,10 +1,141 @@
 # backend/crud.py
+import asyncio
+import base64
+import json
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from backend import models, schemas
+from backend import metrics, models, schemas, search
 from passlib.context import CryptContext
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context (BCRYPT_ROUNDS: cost factor, passlib default is 12)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# ===========================
+# Password hashing executor
+# ===========================
+# bcrypt is CPU-bound (~100s of ms per call), so async routes hand it to a
+# dedicated process pool instead of tying up Starlette's request threadpool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Max hashing jobs (running + waiting) before new requests are rejected
+PASSWORD_HASH_MAX_PENDING = int(
+    os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4))
+)
+# Bulk import hashing jobs in the pool at once (one worker left free for logins when possible)
+PASSWORD_HASH_BULK_JOBS = int(
+    os.getenv("PASSWORD_HASH_BULK_JOBS", str(max(1, PASSWORD_HASH_WORKERS - 1)))
+)
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+_hash_pending = 0
+
+
+metrics.REGISTRY.gauge(
+    "password_hash_pending", "Hashing jobs running or queued.", lambda: _hash_pending
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                _hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    return _hash_executor
+
+
+def shutdown_hash_executor():
+    """Stop the hashing worker processes (called on app shutdown)."""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=True, cancel_futures=True)
+            _hash_executor = None
+
+
+def _hash_sync(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _hash_timed(password: str) -> str:
+    """In-process hash for the sync CRUD path, recorded in metrics."""
+    with metrics.PASSWORD_HASH_LATENCY.time("hash"):
+        return _hash_sync(password)
+
+
+def _verify_sync(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _try_reserve(cap: int) -> bool:
+    global _hash_pending
+    with _hash_executor_lock:
+        if _hash_pending >= cap:
+            return False
+        _hash_pending += 1
+        return True
+
+
+async def _run_reserved(op: str, fn, *args):
+    """Run one job in the pool; the caller already counted it in _hash_pending."""
+    global _hash_pending
+    try:
+        loop = asyncio.get_running_loop()
+        with metrics.PASSWORD_HASH_LATENCY.time(op):
+            return await loop.run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        with _hash_executor_lock:
+            _hash_pending -= 1
+
+
+async def _run_in_hash_executor(op: str, fn, *args):
+    if not _try_reserve(PASSWORD_HASH_MAX_PENDING):
+        metrics.PASSWORD_HASH_REJECTED.inc(op)
+        raise PasswordHasherBusy("Password hashing queue is full")
+    return await _run_reserved(op, fn, *args)
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the worker pool. Raises PasswordHasherBusy if saturated."""
+    return await _run_in_hash_executor("hash", _hash_sync, password)
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords in the shared worker pool (bulk import).
+    At most PASSWORD_HASH_BULK_JOBS are in the pool at once and they count toward
+    the pending cap, so a login waits behind a few bulk jobs, never the whole batch.
+    Bulk jobs wait (instead of failing) while interactive traffic fills the queue.
+    """
+    slots = asyncio.Semaphore(PASSWORD_HASH_BULK_JOBS)
+    # Leave room under the cap for logins/registers
+    cap = max(1, PASSWORD_HASH_MAX_PENDING - PASSWORD_HASH_WORKERS)
+
+    async def one(password: str) -> str:
+        async with slots:
+            while not _try_reserve(cap):
+                await asyncio.sleep(0.01)
+            return await _run_reserved("hash_bulk", _hash_sync, password)
+
+    return list(await asyncio.gather(*(one(p) for p in passwords)))
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the worker pool. Raises PasswordHasherBusy if saturated."""
+    return await _run_in_hash_executor("verify", _verify_sync, plain_password, hashed_password)
 
 # ===========================
 # USER CRUD
@@ -19,11 +150,13 @@ def get_user_by_username(db: Session, username: str):
 def get_users(db: Session, skip: int = 0, limit: int = 10):
     return db.query(models.User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: schemas.UserCreate):
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
     """
     Always hash password before saving.
+    Pass `hashed_password` if it was already hashed (e.g. via `await hash_password`)
+    so bcrypt is not run twice.
     """
-    hashed_pw = pwd_context.hash(user.password)
+    hashed_pw = hashed_password or _hash_timed(user.password)
     db_user = models.User(
         username=user.username,
         hashed_password=hashed_pw,
@@ -32,6 +165,7 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    search.index_user(db_user.id, db_user.username, db_user.role)
     return db_user
 
 def update_user(db: Session, user_id: int, user_update: dict):
@@ -49,12 +183,13 @@ def update_user(db: Session, user_id: int, user_update: dict):
 
         if key in ["password", "hashed_password"]:
             # Always hash new password
-            db_user.hashed_password = pwd_context.hash(value)
+            db_user.hashed_password = _hash_timed(value)
         elif hasattr(db_user, key):
             setattr(db_user, key, value)
 
     db.commit()
     db.refresh(db_user)
+    search.index_user(db_user.id, db_user.username, db_user.role)
     return db_user
 
 def delete_user(db: Session, user_id: int):
@@ -65,10 +200,631 @@ def delete_user(db: Session, user_id: int):
 
     db.delete(db_user)
     db.commit()
+    search.unindex_user(user_id)
     return db_user
 
 # ===========================
-# Helper for verifying password
+# ASYNC USER CRUD (AsyncSession, used by the async routes)
 # ===========================
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+
+async def get_user_async(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+async def get_users_async(db: AsyncSession, skip: int = 0, limit: int = 10):
+    result = await db.execute(select(models.User).offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def create_user_async(db: AsyncSession, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    """
+    Async create_user. Password is hashed in the worker pool unless
+    `hashed_password` is given.
+    """
+    hashed_pw = hashed_password or await hash_password(user.password)
+    db_user = models.User(
+        username=user.username,
+        hashed_password=hashed_pw,
+        role=user.role if user.role else "user"
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    search.index_user(db_user.id, db_user.username, db_user.role)
+    return db_user
+
+async def update_user_async(db: AsyncSession, user_id: int, user_update: dict):
+    """Async update_user. Password is re-hashed in the worker pool."""
+    db_user = await get_user_async(db, user_id)
+    if not db_user:
+        return None
+
+    for key, value in user_update.items():
+        if value is None:
+            continue
+
+        if key in ["password", "hashed_password"]:
+            db_user.hashed_password = await hash_password(value)
+        elif hasattr(db_user, key):
+            setattr(db_user, key, value)
+
+    await db.commit()
+    await db.refresh(db_user)
+    search.index_user(db_user.id, db_user.username, db_user.role)
+    return db_user
+
+async def delete_user_async(db: AsyncSession, user_id: int):
+    """Async delete_user."""
+    db_user = await get_user_async(db, user_id)
+    if not db_user:
+        return None
+
+    await db.delete(db_user)
+    await db.commit()
+    search.unindex_user(user_id)
+    return db_user
+
+# ===========================
+# USER LISTING (keyset pagination, no password hashes)
+# ===========================
+# Only these columns are ever loaded for listings/exports
+USER_LIST_COLUMNS = (models.User.id, models.User.username, models.User.role)
+USER_SORT_KEYS = {"id": models.User.id, "username": models.User.username}
+
+
+def encode_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+
+def _user_list_query(sort: str, after=None, prefix: Optional[str] = None):
+    key = USER_SORT_KEYS[sort]
+    query = select(*USER_LIST_COLUMNS)
+    if prefix:
+        # LIKE 'prefix%' can use the username index
+        query = query.where(models.User.username.startswith(prefix, autoescape=True))
+    if after is not None:
+        query = query.where(key > after)
+    return query.order_by(key)
+
+
+async def list_users_async(
+    db: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    prefix: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of users ordered by `sort` (id or username), starting after `cursor`.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    # type() rather than isinstance: a bool cursor (JSON true) would pass as an int
+    if after is not None and type(after) is not (int if sort == "id" else str):
+        raise ValueError("Cursor does not match sort key")
+    result = await db.execute(_user_list_query(sort, after, prefix).limit(limit + 1))
+    rows = [dict(row) for row in result.mappings()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][sort])
+    return rows, next_cursor
+
+
+async def iter_users_async(
+    db: AsyncSession, sort: str = "id", prefix: Optional[str] = None, chunk_size: int = 1000
+) -> AsyncIterator[dict]:
+    """Yield every matching user, fetching `chunk_size` rows per keyset query."""
+    after = None
+    while True:
+        result = await db.execute(_user_list_query(sort, after, prefix).limit(chunk_size))
+        rows = result.mappings().all()
+        for row in rows:
+            yield dict(row)
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1][sort]
+
+
+async def search_users_like_async(
+    db: AsyncSession, query: str, limit: int = 10, role: Optional[str] = None
+) -> List[dict]:
+    """
+    Fallback while the in-memory search index is building: LIKE '%q%' (full scan),
+    or LIKE 'q%' for queries too short for substring matching, same as the index.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    if len(query) < search.SUBSTRING_MIN_CHARS:
+        match = models.User.username.startswith(query, autoescape=True)
+    else:
+        match = models.User.username.contains(query, autoescape=True)
+    stmt = select(*USER_LIST_COLUMNS).where(match)
+    if role is not None:
+        stmt = stmt.where(models.User.role == role)
+    result = await db.execute(stmt.order_by(models.User.username).limit(limit))
+    return [dict(row) for row in result.mappings()]
+
+# ===========================
+# ROLE & PERMISSION CRUD (async)
+# ===========================
+ROLES_CACHE_KEY = "roles"
+
+# Seeded on startup so the built-in roles keep their access
+DEFAULT_PERMISSIONS = {
+    "users:read": "View and export users",
+    "users:write": "Create, import and edit users",
+    "roles:read": "View roles and permissions",
+    "roles:write": "Create and edit roles and permissions",
+    "applications:approve": "Approve applications and view team summaries",
+}
+DEFAULT_ROLES = {
+    "admin": ("Full system access", list(DEFAULT_PERMISSIONS)),
+    "user": ("Basic access", []),
+}
+
+
+class RoleError(ValueError):
+    """Invalid role/permission change (unknown permission code, duplicate name)."""
+
+
+def role_to_dict(role: models.Role) -> dict:
+    return {
+        "id": role.id,
+        "name": role.name,
+        "description": role.description,
+        "modified_by": role.modified_by,
+        "permissions": sorted(p.code for p in role.permissions),
+    }
+
+
+async def get_cache_version_async(db: AsyncSession, name: str) -> int:
+    result = await db.execute(
+        select(models.CacheVersion.version).where(models.CacheVersion.name == name)
+    )
+    return result.scalar() or 0
+
+
+async def _bump_cache_version(db: AsyncSession, name: str):
+    """Bump inside the caller's transaction so readers never see a stale version."""
+    row = await db.get(models.CacheVersion, name)
+    if row is None:
+        db.add(models.CacheVersion(name=name, version=1))
+    else:
+        row.version += 1
+
+
+async def get_permissions_async(db: AsyncSession):
+    result = await db.execute(select(models.Permission).order_by(models.Permission.code))
+    return result.scalars().all()
+
+
+async def create_permission_async(db: AsyncSession, permission: schemas.PermissionCreate):
+    existing = await db.execute(
+        select(models.Permission).where(models.Permission.code == permission.code)
+    )
+    if existing.scalars().first():
+        raise RoleError(f"Permission '{permission.code}' already exists")
+    db_permission = models.Permission(code=permission.code, description=permission.description or "")
+    db.add(db_permission)
+    await db.commit()
+    await db.refresh(db_permission)
+    return db_permission
+
+
+async def _permissions_by_code(db: AsyncSession, codes: List[str]):
+    if not codes:
+        return []
+    result = await db.execute(select(models.Permission).where(models.Permission.code.in_(codes)))
+    found = result.scalars().all()
+    missing = set(codes) - {p.code for p in found}
+    if missing:
+        raise RoleError(f"Unknown permission(s): {', '.join(sorted(missing))}")
+    return found
+
+
+async def get_roles_async(db: AsyncSession):
+    result = await db.execute(select(models.Role).order_by(models.Role.name))
+    return result.scalars().all()
+
+
+async def get_role_async(db: AsyncSession, role_id: int):
+    return await db.get(models.Role, role_id)
+
+
+async def get_role_by_name_async(db: AsyncSession, name: str):
+    result = await db.execute(select(models.Role).where(models.Role.name == name))
+    return result.scalars().first()
+
+
+async def create_role_async(db: AsyncSession, role: schemas.RoleCreate, modified_by: str = "System"):
+    if await get_role_by_name_async(db, role.name):
+        raise RoleError(f"Role '{role.name}' already exists")
+    db_role = models.Role(
+        name=role.name,
+        description=role.description or "",
+        modified_by=modified_by,
+        permissions=await _permissions_by_code(db, role.permissions),
+    )
+    db.add(db_role)
+    await _bump_cache_version(db, ROLES_CACHE_KEY)
+    await db.commit()
+    await db.refresh(db_role)
+    return db_role
+
+
+async def update_role_async(db: AsyncSession, role_id: int, role_update: schemas.RoleUpdate,
+                            modified_by: str = "System"):
+    db_role = await get_role_async(db, role_id)
+    if not db_role:
+        return None
+
+    old_name = db_role.name
+    if role_update.name is not None and role_update.name != db_role.name:
+        if db_role.name in DEFAULT_ROLES:
+            raise RoleError(f"Built-in role '{db_role.name}' cannot be renamed")
+        if await get_role_by_name_async(db, role_update.name):
+            raise RoleError(f"Role '{role_update.name}' already exists")
+        # Users reference roles by name
+        await db.execute(
+            update(models.User).where(models.User.role == db_role.name).values(role=role_update.name)
+        )
+        db_role.name = role_update.name
+    if role_update.description is not None:
+        db_role.description = role_update.description
+    if role_update.permissions is not None:
+        db_role.permissions = await _permissions_by_code(db, role_update.permissions)
+    db_role.modified_by = modified_by
+
+    await _bump_cache_version(db, ROLES_CACHE_KEY)
+    await db.commit()
+    await db.refresh(db_role)
+    if db_role.name != old_name:
+        search.rename_role(old_name, db_role.name)
+    return db_role
+
+
+async def delete_role_async(db: AsyncSession, role_id: int):
+    db_role = await get_role_async(db, role_id)
+    if not db_role:
+        return None
+    if db_role.name in DEFAULT_ROLES:
+        raise RoleError(f"Built-in role '{db_role.name}' cannot be deleted")
+
+    await db.delete(db_role)
+    await _bump_cache_version(db, ROLES_CACHE_KEY)
+    await db.commit()
+    return db_role
+
+
+async def get_role_permissions_async(db: AsyncSession) -> dict:
+    """{role id: (role name, frozenset of permission codes)} in one query."""
+    result = await db.execute(
+        select(models.Role.id, models.Role.name, models.Permission.code)
+        .select_from(models.Role)
+        .outerjoin(models.role_permissions, models.role_permissions.c.role_id == models.Role.id)
+        .outerjoin(models.Permission, models.Permission.id == models.role_permissions.c.permission_id)
+    )
+    names, codes_by_id = {}, {}
+    for role_id, role_name, code in result:
+        names[role_id] = role_name
+        codes = codes_by_id.setdefault(role_id, set())
+        if code is not None:
+            codes.add(code)
+    return {role_id: (names[role_id], frozenset(codes)) for role_id, codes in codes_by_id.items()}
+
+
+async def seed_roles_async(db: AsyncSession):
+    """Insert the default permissions/roles if missing. Safe to run on every startup."""
+    existing = {p.code: p for p in await get_permissions_async(db)}
+    for code, description in DEFAULT_PERMISSIONS.items():
+        if code not in existing:
+            existing[code] = models.Permission(code=code, description=description)
+            db.add(existing[code])
+
+    changed = False
+    for name, (description, codes) in DEFAULT_ROLES.items():
+        db_role = await get_role_by_name_async(db, name)
+        if not db_role:
+            db.add(models.Role(
+                name=name, description=description, permissions=[existing[c] for c in codes]
+            ))
+            changed = True
+            continue
+        # Built-in roles pick up permissions added in later releases
+        have = {p.code for p in db_role.permissions}
+        missing = [existing[c] for c in codes if c not in have]
+        if missing:
+            db_role.permissions.extend(missing)
+            changed = True
+    if changed:
+        await _bump_cache_version(db, ROLES_CACHE_KEY)
+    await db.commit()
+
+
+# ===========================
+# TIME LOGS, APPLICATIONS & PERIOD SUMMARIES (async)
+# ===========================
+LEAVE_DAYS_PER_YEAR = int(os.getenv("LEAVE_DAYS_PER_YEAR", "15"))
+MAX_APPLICATION_DAYS = 366
+SUMMARY_COLUMNS = ("minutes_worked", "overtime_minutes", "leave_days", "time_log_count")
+# Approved applications of these kinds count toward overtime_minutes
+OVERTIME_KINDS = ("overtime", "work_restday", "work_holiday")
+
+
+class ApplicationError(ValueError):
+    """Invalid time log / application input."""
+
+
+def minutes_between(time_in, time_out) -> int:
+    """Minutes from time_in to time_out; an earlier time_out means the shift crossed midnight."""
+    start = time_in.hour * 60 + time_in.minute
+    end = time_out.hour * 60 + time_out.minute
+    return (end - start) % (24 * 60)
+
+
+def _summary_periods(day: date) -> Tuple[str, str]:
+    return day.strftime("%Y-%m"), day.strftime("%Y")
+
+
+def _add_delta(deltas: Dict, user_id: int, day: date, column: str, amount: int):
+    for period in _summary_periods(day):
+        deltas[(user_id, period)][column] += amount
+
+
+async def _apply_summary_deltas(db: AsyncSession, deltas: Dict):
+    """
+    Add deltas to period_summaries with one upsert per (user, period) row,
+    sent as a single executemany. Runs inside the caller's transaction.
+    """
+    rows = [
+        {"user_id": user_id, "period": period, **{c: values.get(c, 0) for c in SUMMARY_COLUMNS}}
+        for (user_id, period), values in deltas.items()
+        if any(values.values())
+    ]
+    if not rows:
+        return
+    table = models.PeriodSummary.__table__
+    dialect = (await db.connection()).dialect.name
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "period"],
+            set_={c: table.c[c] + stmt.excluded[c] for c in SUMMARY_COLUMNS},
+        )
+        await db.execute(stmt, rows)
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {c: table.c[c] + stmt.inserted[c] for c in SUMMARY_COLUMNS}
+        )
+        await db.execute(stmt, rows)
+    else:
+        for row in rows:
+            result = await db.execute(
+                update(table)
+                .where(table.c.user_id == row["user_id"], table.c.period == row["period"])
+                .values({c: table.c[c] + row[c] for c in SUMMARY_COLUMNS})
+            )
+            if result.rowcount == 0:
+                await db.execute(table.insert().values(**row))
+
+
+def _new_deltas():
+    return defaultdict(lambda: dict.fromkeys(SUMMARY_COLUMNS, 0))
+
+
+def _time_log_deltas(deltas: Dict, log: models.TimeLog, sign: int):
+    _add_delta(deltas, log.user_id, log.work_date, "minutes_worked", sign * log.minutes_worked)
+    _add_delta(deltas, log.user_id, log.work_date, "time_log_count", sign)
+
+
+async def create_time_logs_async(db: AsyncSession, user_id: int, entries: List[schemas.TimeLogCreate]):
+    """Insert a batch of time logs and update the summaries in one transaction."""
+    deltas = _new_deltas()
+    logs = []
+    for entry in entries:
+        log = models.TimeLog(
+            user_id=user_id,
+            work_date=entry.work_date,
+            time_in=entry.time_in,
+            time_out=entry.time_out,
+            minutes_worked=minutes_between(entry.time_in, entry.time_out),
+            reason=entry.reason or "",
+        )
+        logs.append(log)
+        _time_log_deltas(deltas, log, +1)
+    db.add_all(logs)
+    await db.flush()
+    await _apply_summary_deltas(db, deltas)
+    await db.commit()
+    return logs
+
+
+async def get_time_logs_async(db: AsyncSession, user_id: int, start: date, end: date):
+    """Time logs in [start, end], served by the (user_id, work_date) index."""
+    result = await db.execute(
+        select(models.TimeLog)
+        .where(
+            models.TimeLog.user_id == user_id,
+            models.TimeLog.work_date >= start,
+            models.TimeLog.work_date <= end,
+        )
+        .order_by(models.TimeLog.work_date, models.TimeLog.time_in)
+    )
+    return result.scalars().all()
+
+
+async def _get_own_time_log(db: AsyncSession, user_id: int, log_id: int):
+    log = await db.get(models.TimeLog, log_id)
+    return log if log and log.user_id == user_id else None
+
+
+async def update_time_log_async(db: AsyncSession, user_id: int, log_id: int, entry: schemas.TimeLogCreate):
+    log = await _get_own_time_log(db, user_id, log_id)
+    if not log:
+        return None
+    deltas = _new_deltas()
+    _time_log_deltas(deltas, log, -1)
+    log.work_date = entry.work_date
+    log.time_in = entry.time_in
+    log.time_out = entry.time_out
+    log.minutes_worked = minutes_between(entry.time_in, entry.time_out)
+    log.reason = entry.reason or ""
+    _time_log_deltas(deltas, log, +1)
+    await _apply_summary_deltas(db, deltas)
+    await db.commit()
+    await db.refresh(log)
+    return log
+
+
+async def delete_time_log_async(db: AsyncSession, user_id: int, log_id: int):
+    log = await _get_own_time_log(db, user_id, log_id)
+    if not log:
+        return None
+    deltas = _new_deltas()
+    _time_log_deltas(deltas, log, -1)
+    await db.delete(log)
+    await _apply_summary_deltas(db, deltas)
+    await db.commit()
+    return log
+
+
+def _application_deltas(deltas: Dict, application: models.Application, sign: int):
+    """Summary effect of an *approved* application."""
+    if application.kind == "leave":
+        day = application.start_date
+        while day <= application.end_date:
+            _add_delta(deltas, application.user_id, day, "leave_days", sign)
+            day += timedelta(days=1)
+    elif application.kind in OVERTIME_KINDS:
+        _add_delta(deltas, application.user_id, application.start_date, "overtime_minutes",
+                   sign * application.minutes)
+
+
+async def create_application_async(db: AsyncSession, user_id: int, application: schemas.ApplicationCreate):
+    end_date = application.end_date or application.start_date
+    if end_date < application.start_date:
+        raise ApplicationError("End date is before start date")
+    if (end_date - application.start_date).days >= MAX_APPLICATION_DAYS:
+        raise ApplicationError(f"Applications cannot span more than {MAX_APPLICATION_DAYS} days")
+    if application.kind == "leave" and not application.leave_type:
+        raise ApplicationError("Leave type is required")
+
+    minutes = application.minutes or 0
+    if application.kind in ("work_restday", "work_holiday"):
+        if not (application.time_in and application.time_out):
+            raise ApplicationError("Time in and time out are required")
+        minutes = minutes_between(application.time_in, application.time_out)
+    if application.kind == "change_schedule" and not (application.requested_in and application.requested_out):
+        raise ApplicationError("Requested schedule is required")
+
+    db_application = models.Application(
+        user_id=user_id,
+        kind=application.kind,
+        start_date=application.start_date,
+        end_date=end_date,
+        leave_type=application.leave_type,
+        minutes=minutes,
+        offset=bool(application.offset),
+        time_in=application.time_in,
+        time_out=application.time_out,
+        requested_in=application.requested_in,
+        requested_out=application.requested_out,
+        reason=application.reason or "",
+    )
+    db.add(db_application)
+    await db.commit()
+    await db.refresh(db_application)
+    return db_application
+
+
+async def get_applications_async(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = 100,
+):
+    query = select(models.Application)
+    if user_id is not None:
+        query = query.where(models.Application.user_id == user_id)
+    if status:
+        query = query.where(models.Application.status == status)
+    if kind:
+        query = query.where(models.Application.kind == kind)
+    if start:
+        query = query.where(models.Application.start_date >= start)
+    if end:
+        query = query.where(models.Application.start_date <= end)
+    result = await db.execute(
+        query.order_by(models.Application.start_date.desc(), models.Application.id.desc()).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def decide_application_async(db: AsyncSession, application_id: int, status: str, decided_by: str):
+    """Approve/reject; the summaries follow the approved state either way."""
+    db_application = await db.get(models.Application, application_id)
+    if not db_application:
+        return None
+    deltas = _new_deltas()
+    if db_application.status == "approved" and status != "approved":
+        _application_deltas(deltas, db_application, -1)
+    elif db_application.status != "approved" and status == "approved":
+        _application_deltas(deltas, db_application, +1)
+    db_application.status = status
+    db_application.decided_by = decided_by
+    await _apply_summary_deltas(db, deltas)
+    await db.commit()
+    await db.refresh(db_application)
+    return db_application
+
+
+def _summary_to_dict(row: Optional[models.PeriodSummary], user_id: int, period: str) -> dict:
+    summary = {"user_id": user_id, "period": period, **dict.fromkeys(SUMMARY_COLUMNS, 0)}
+    if row is not None:
+        summary.update({c: getattr(row, c) for c in SUMMARY_COLUMNS})
+    return summary
+
+
+async def get_period_summary_async(db: AsyncSession, user_id: int, period: str) -> dict:
+    """
+    Precomputed summary for 'YYYY-MM' or 'YYYY' plus the leave balance for that year.
+    Reads at most two primary-key rows, never the raw logs.
+    """
+    year = period[:4]
+    result = await db.execute(
+        select(models.PeriodSummary).where(
+            models.PeriodSummary.user_id == user_id,
+            models.PeriodSummary.period.in_({period, year}),
+        )
+    )
+    rows = {row.period: row for row in result.scalars()}
+    summary = _summary_to_dict(rows.get(period), user_id, period)
+    year_leave = rows[year].leave_days if year in rows else 0
+    summary["leave_balance"] = LEAVE_DAYS_PER_YEAR - year_leave
+    return summary
+
+
+async def get_team_summaries_async(db: AsyncSession, period: str, after_user_id: int = 0, limit: int = 100):
+    """Summaries of every user for a period (approver dashboard), keyset-paged by user_id."""
+    result = await db.execute(
+        select(models.PeriodSummary)
+        .where(models.PeriodSummary.period == period, models.PeriodSummary.user_id > after_user_id)
+        .order_by(models.PeriodSummary.user_id)
+        .limit(limit)
+    )
+    return [_summary_to_dict(row, row.user_id, period) for row in result.scalars()]
@@ -1,11 +1,18 @@
 # backend/database.py
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
 from urllib.parse import quote_plus  # 🔑 para i-encode ang password
 
+from backend import metrics
+
 # Load environment variables mula sa .env
 load_dotenv()
 
@@ -15,19 +22,353 @@ DB_PASSWORD = quote_plus(os.getenv("DB_PASSWORD", "P@ssw0rd"))  # encode special
 DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
 DB_NAME = os.getenv("DB_NAME", "project")
 
-# Connection string para sa MySQL
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+# Connection string para sa MySQL (override with DATABASE_URL, e.g. sqlite:///./app.db)
+DATABASE_URL = os.getenv(
+    "DATABASE_URL", f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+)
+
+# Async drivers for each sync driver we support
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver for its async counterpart (pymysql -> aiomysql, sqlite -> aiosqlite)."""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()]).render_as_string(
+        hide_password=False
+    )
+
 
-# ⚡ Optimized SQLAlchemy engine settings
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,          # wag na mag-log ng lahat ng SQL queries (optional)
-    pool_pre_ping=True,  # check connection bago gamitin
-    pool_recycle=3600    # recycle connections every hour (to avoid MySQL timeout)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Optional read replica: SELECTs go here, writes (and reads after a write) go to the primary
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+ASYNC_DATABASE_REPLICA_URL = os.getenv(
+    "ASYNC_DATABASE_REPLICA_URL", to_async_url(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else ""
 )
+# After a commit, the same client reads from the primary this long (replica lag allowance)
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+# SQLite mode (e.g. DATABASE_URL=sqlite:///./app.db): pragmas applied on every new connection
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # safe with WAL
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "32768"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Pool sizing (tune against /metrics: db_pool_checkout_wait_seconds, db_pool_overflow)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+
+
+# ===== Pool telemetry =====
+class _TimedCheckoutMixin:
+    """Records how long each checkout waited for a connection."""
+
+    _metrics_name = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start, self._metrics_name)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_kwargs(url: str, poolclass) -> dict:
+    # In-memory SQLite uses a single-connection pool; sizing does not apply
+    if make_url(url).database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
+INSTRUMENTED_ENGINES = {}
+
+
+def instrument_engine(sync_engine, name: str):
+    """Attach query timing and pool event counters to an engine."""
+    sync_engine.pool._metrics_name = name
+    INSTRUMENTED_ENGINES[name] = sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.DB_QUERY_LATENCY.observe(time.perf_counter() - conn.info["query_start"].pop(), name)
+
+    @event.listens_for(sync_engine, "engine_disposed")
+    def _disposed(conn):
+        # dispose() swaps in a fresh pool; re-tag it
+        sync_engine.pool._metrics_name = name
+
+    @event.listens_for(sync_engine, "checkout")
+    def _checkout(dbapi_conn, conn_record, conn_proxy):
+        metrics.DB_POOL_CHECKOUTS.inc(name)
+
+    @event.listens_for(sync_engine, "connect")
+    def _connect(dbapi_conn, conn_record):
+        metrics.DB_POOL_CONNECTS.inc(name)
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _invalidate(dbapi_conn, conn_record, exception):
+        metrics.DB_POOL_INVALIDATIONS.inc(name)
+
+
+def _pool_stat(stat: str) -> dict:
+    values = {}
+    for name, eng in INSTRUMENTED_ENGINES.items():
+        fn = getattr(eng.pool, stat, None)
+        if fn is not None:
+            values[(name,)] = fn()
+    return values
+
+
+metrics.REGISTRY.gauge(
+    "db_pool_checked_out", "Connections currently checked out.", lambda: _pool_stat("checkedout"), ("engine",)
+)
+metrics.REGISTRY.gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size.",
+    lambda: {k: max(v, 0) for k, v in _pool_stat("overflow").items()},
+    ("engine",),
+)
+
+# ===== SQLite pragmas =====
+def apply_sqlite_pragmas(sync_engine):
+    """WAL + relaxed fsync + bigger page cache on every new SQLite connection."""
+    memory = make_url(str(sync_engine.url)).database in (None, "", ":memory:")
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_conn, conn_record):
+        cursor = dbapi_conn.cursor()
+        if not memory:
+            cursor.execute("PRAGMA journal_mode=WAL")  # readers don't block the writer
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+# ===== Engines (created lazily on first use, so importing never touches the DB) =====
+_engines = {}
+_engine_lock = threading.Lock()
+
+
+def _make_sync_engine(url: str, name: str):
+    # ⚡ Optimized SQLAlchemy engine settings
+    eng = create_engine(
+        url,
+        echo=False,          # wag na mag-log ng lahat ng SQL queries (optional)
+        pool_pre_ping=True,  # check connection bago gamitin
+        pool_recycle=DB_POOL_RECYCLE,  # recycle connections (to avoid MySQL timeout)
+        connect_args={"check_same_thread": False} if make_url(url).get_backend_name() == "sqlite" else {},
+        **pool_kwargs(url, TimedQueuePool),
+    )
+    return eng, eng
+
+
+def _make_async_engine(url: str, name: str):
+    eng = create_async_engine(
+        url,
+        echo=False,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE,
+        **pool_kwargs(url, TimedAsyncQueuePool),
+    )
+    return eng, eng.sync_engine
+
+
+def _lazy_engine(name: str, url: str, factory):
+    eng = _engines.get(name)
+    if eng is None:
+        with _engine_lock:
+            eng = _engines.get(name)
+            if eng is None:
+                eng, sync_engine = factory(url, name)
+                if sync_engine.dialect.name == "sqlite":
+                    apply_sqlite_pragmas(sync_engine)
+                instrument_engine(sync_engine, name)
+                _engines[name] = eng
+    return eng
+
+
+def get_engine():
+    return _lazy_engine("sync", DATABASE_URL, _make_sync_engine)
+
+
+def get_async_engine():
+    """Async engine para sa async routes (aiomysql / aiosqlite)."""
+    return _lazy_engine("async", ASYNC_DATABASE_URL, _make_async_engine)
+
+
+def get_replica_engine():
+    """Read replica (sync); the primary when DATABASE_REPLICA_URL is not set."""
+    if not DATABASE_REPLICA_URL:
+        return get_engine()
+    return _lazy_engine("sync-replica", DATABASE_REPLICA_URL, _make_sync_engine)
+
+
+def get_async_replica_engine():
+    if not ASYNC_DATABASE_REPLICA_URL:
+        return get_async_engine()
+    return _lazy_engine("async-replica", ASYNC_DATABASE_REPLICA_URL, _make_async_engine)
+
+
+async def dispose_engines():
+    for eng in list(_engines.values()):
+        result = eng.dispose()
+        if result is not None:
+            await result  # AsyncEngine.dispose() is a coroutine
+
+
+class _LazySessionFactory:
+    """Session factory that binds to its engine on the first call."""
+
+    def __init__(self, factory, engine_getter):
+        self.factory = factory
+        self.engine_getter = engine_getter
+        self._bound = False
+
+    def __call__(self, **kwargs):
+        if not self._bound:
+            self.factory.configure(bind=self.engine_getter())
+            self._bound = True
+        return self.factory(**kwargs)
+
+
+# ===== Read/write routing =====
+class RecentWriters:
+    """
+    Clients (sticky keys) that committed recently -> until when they read from the primary.
+    Per process: with several workers the app also sets a short-lived cookie (see
+    server.get_db) so the next request is pinned whichever worker serves it.
+    """
+
+    def __init__(self, window: float = REPLICA_STICKY_SECONDS, max_entries: int = 100000):
+        self.window = window
+        self.max_entries = max_entries
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._items) >= self.max_entries:
+                self._items = {k: t for k, t in self._items.items() if t > now}
+            self._items[key] = now + self.window
+
+    def is_sticky(self, key: str) -> bool:
+        until = self._items.get(key)
+        return until is not None and until > time.monotonic()
+
+
+RECENT_WRITERS = RecentWriters()
+
+
+class RoutingSession(Session):
+    """
+    SELECTs go to the replica; flushes, DML and raw SQL go to the primary.
+    Once a session has written, it stays on the primary (read-your-writes), and
+    after it commits its `sticky_key` (see session.info) is pinned to the primary
+    for REPLICA_STICKY_SECONDS so the client's next requests see the write too.
+    """
+
+    primary = staticmethod(get_engine)
+    replica = staticmethod(get_replica_engine)
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        info = self.info
+        if (
+            info.get("use_primary")
+            or self._flushing
+            or not getattr(clause, "is_select", False)
+        ):
+            return self.primary()
+        key = info.get("sticky_key")
+        if key is not None and RECENT_WRITERS.is_sticky(key):
+            info["use_primary"] = True
+            return self.primary()
+        return self.replica()
+
+
+class AsyncRoutingSession(RoutingSession):
+    """Sync side of an AsyncSession (get_bind must return the async engines' sync_engine)."""
+
+    primary = staticmethod(lambda: get_async_engine().sync_engine)
+    replica = staticmethod(lambda: get_async_replica_engine().sync_engine)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _routing_after_flush(session, flush_context):
+    session.info["use_primary"] = True
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _routing_orm_execute(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["use_primary"] = True
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _routing_after_commit(session):
+    if session.info.pop("wrote", False):
+        session.info["committed_write"] = True
+        if session.info.get("sticky_key") is not None:
+            RECENT_WRITERS.mark(session.info["sticky_key"])
+
+
+def use_primary(session):
+    """Send every further query of this (sync or async) session to the primary."""
+    session.info["use_primary"] = True
+
 
 # Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if DATABASE_REPLICA_URL:
+    SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+else:
+    SessionLocal = _LazySessionFactory(sessionmaker(autocommit=False, autoflush=False), get_engine)
+
+# Async session factory; expire_on_commit=False para magamit pa ang objects after commit
+if ASYNC_DATABASE_REPLICA_URL:
+    AsyncSessionLocal = async_sessionmaker(
+        class_=AsyncSession, sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    AsyncSessionLocal = _LazySessionFactory(
+        async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False),
+        get_async_engine,
+    )
+
+
+def __getattr__(name):
+    # Backwards compatible `database.engine` / `database.async_engine` (created on access)
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Base class para sa models
 Base = declarative_base()
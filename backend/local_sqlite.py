@@ -0,0 +1,37 @@
+# backend/local_sqlite.py
+"""
+Local SQLite file shared by the uvicorn workers of one host.
+
+Backs the "sqlite" flavour of CAPTCHA_STORE, RATE_LIMIT_STORE and
+REVOKED_TOKEN_STORE. Those stores set `blocking = True`: a call may wait up to
+`timeout` for another worker's write lock, so async routes make it off the
+event loop (server.call_store).
+"""
+import sqlite3
+import threading
+from typing import Sequence
+
+
+class LocalSqlite:
+    """
+    One autocommit connection per thread to `path`, in WAL mode.
+    Opened on first use, so creating a store never touches disk; `schema` is a
+    list of idempotent DDL statements (CREATE ... IF NOT EXISTS) run on open.
+    """
+
+    def __init__(self, path: str, schema: Sequence[str], timeout: float = 5):
+        self.path = path
+        self.schema = tuple(schema)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.schema:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
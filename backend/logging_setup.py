@@ -0,0 +1,207 @@
+# backend/logging_setup.py
+"""
+Logging: request threads only put records on a bounded queue; a background
+QueueListener formats them (JSON lines by default) and writes them out.
+
+Settings (env):
+    LOG_LEVEL       root level (DEBUG in development, INFO otherwise)
+    LOG_FORMAT      "json" | "text"
+    LOG_ASYNC       "1" = queue + listener thread, "0" = write from the calling thread
+    LOG_QUEUE_SIZE  max queued records; beyond that records are dropped and counted
+    LOG_SAMPLING    per-logger sample rates for DEBUG records,
+                    e.g. "backend.server.auth=0.01,backend.crud=0.1"
+    LOG_QUIET       chatty loggers kept at WARNING (sqlalchemy at INFO would echo every SQL)
+"""
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from backend import metrics
+
+# ===== Settings =====
+ENV = os.getenv("ENV", "development")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if ENV == "development" else "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_ASYNC = os.getenv("LOG_ASYNC", "1") == "1"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+# aiosqlite logs every cursor operation and the pools every checkout at DEBUG
+LOG_QUIET = os.getenv("LOG_QUIET", "aiosqlite,multipart,sqlalchemy,backend.database")
+
+LOG_RECORDS_DROPPED = metrics.REGISTRY.counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full."
+)
+
+# Set per request by the request-id middleware; "-" outside a request
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else came in via `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Parse LOG_SAMPLING: 'a.b=0.1,c=0.5' -> {'a.b': 0.1, 'c': 0.5}."""
+    rates = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, rate = part.partition("=")
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+# ===========================
+# Filters / formatter
+# ===========================
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id; must run in the thread that logged."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a random fraction of DEBUG records per logger (longest matching
+    logger-name prefix wins). INFO and above are never sampled.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._cache: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + ".%03dZ" % record.msecs,
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text  # formatted by DroppingQueueHandler.prepare
+        return json.dumps(entry, default=str)
+
+
+_EXC_FORMATTER = logging.Formatter()
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class folds the traceback into msg; keep it in exc_text so the
+        # listener's formatter still sees message and traceback separately.
+        # exc_info itself is dropped: its frames would keep the caller's locals alive.
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+# ===========================
+# Setup
+# ===========================
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_lock = threading.Lock()
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    use_queue: bool = LOG_ASYNC,
+    sampling: str = LOG_SAMPLING,
+    stream=None,
+):
+    """Install the root handler. Safe to call again; replaces the previous setup."""
+    global _listener, _queue_handler
+    with _lock:
+        _stop_listener()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        handler = output
+        if use_queue:
+            handler = _queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+            _listener = QueueListener(handler.queue, output, respect_handler_level=False)
+            _listener.start()
+        # Filters run in the logging thread: sample first so dropped records cost nothing more
+        handler.addFilter(SamplingFilter(parse_sampling(sampling)))
+        handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        for old in list(root.handlers):
+            root.removeHandler(old)
+        root.addHandler(handler)
+        root.setLevel(level)
+        for name in filter(None, (n.strip() for n in LOG_QUIET.split(","))):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def _stop_listener():
+    """Flush the queue and write directly from now on (logs during shutdown still show up)."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        for output in _listener.handlers:
+            for f in _queue_handler.filters:
+                output.addFilter(f)
+            root.addHandler(output)
+        _listener = _queue_handler = None
+
+
+def stop_logging():
+    with _lock:
+        _stop_listener()
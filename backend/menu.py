@@ -0,0 +1,42 @@
+# backend/menu.py
+"""
+Sidebar module catalog. Each entry needs `permission` (None = every logged-in
+user); groups are shown when at least one child is visible. The filtered menu
+is memoized per permission set, so each role's menu is built once per
+role/permission change.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from typing import FrozenSet, List, Optional
+
+MODULES = [
+    {"name": "Dashboard", "path": "/modules/dashboard/dashboard.html", "permission": None},
+    {
+        "name": "User Management",
+        "children": [
+            {"name": "User Manager", "path": "/modules/usermanager/user-manager.html", "permission": "users:read"},
+            {"name": "Role Manager", "path": "/modules/role/role-manager.html", "permission": "roles:read"},
+        ],
+    },
+    {"name": "Reports", "path": "/modules/reports/reports.html", "permission": "applications:approve"},
+    {"name": "Settings", "path": "/modules/settings/settings.html", "permission": None},
+]
+
+# Changes whenever the catalog above is edited; part of the /api/bootstrap ETag
+MENU_VERSION = hashlib.sha256(json.dumps(MODULES, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _visible(item: dict, permissions: FrozenSet[str]) -> Optional[dict]:
+    if "children" in item:
+        children = [c for c in (_visible(child, permissions) for child in item["children"]) if c]
+        return {"name": item["name"], "children": children} if children else None
+    if item["permission"] is None or item["permission"] in permissions:
+        return {"name": item["name"], "path": item["path"]}
+    return None
+
+
+@lru_cache(maxsize=128)
+def menu_for(permissions: FrozenSet[str]) -> List[dict]:
+    """Menu visible with these permissions. Cached: treat the result as read-only."""
+    return [m for m in (_visible(item, permissions) for item in MODULES) if m]
@@ -0,0 +1,191 @@
+# backend/migrate.py
+"""
+Schema versioning.
+
+The app only checks the single `schema_version` row on startup; creating or
+changing tables is done here, explicitly:
+
+    python -m backend.migrate           # apply pending migrations
+    python -m backend.migrate --check   # exit 1 if the DB is behind
+"""
+import argparse
+import sys
+
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Time, func,
+    inspect, select,
+)
+
+from backend import models
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database schema version does not match the application."""
+
+
+# ===========================
+# Version 1: the tables as they were when versioning started.
+# A frozen copy, not models.Base.metadata: later migrations change the models,
+# and a fresh DB must still go through every step in order.
+# ===========================
+_v1 = MetaData()
+
+Table(
+    "schema_version", _v1,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+Table(
+    "users", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String(50), unique=True, index=True, nullable=False),
+    Column("hashed_password", String(255), nullable=False),
+    Column("role", String(20), nullable=False),
+)
+Table(
+    "role_permissions", _v1,
+    Column("role_id", Integer, ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True),
+    Column("permission_id", Integer, ForeignKey("permissions.id", ondelete="CASCADE"), primary_key=True),
+)
+Table(
+    "roles", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(20), unique=True, index=True, nullable=False),
+    Column("description", String(255), nullable=False),
+    Column("modified_by", String(50), nullable=False),
+)
+Table(
+    "permissions", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("code", String(50), unique=True, index=True, nullable=False),
+    Column("description", String(255), nullable=False),
+)
+Table(
+    "cache_versions", _v1,
+    Column("name", String(50), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+Table(
+    "time_logs", _v1,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("work_date", Date, nullable=False),
+    Column("time_in", Time, nullable=False),
+    Column("time_out", Time, nullable=False),
+    Column("minutes_worked", Integer, nullable=False),
+    Column("reason", String(255), nullable=False),
+    Index("ix_time_logs_user_date", "user_id", "work_date"),
+)
+Table(
+    "applications", _v1,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("kind", String(20), nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("start_date", Date, nullable=False),
+    Column("end_date", Date, nullable=False),
+    Column("leave_type", String(20)),
+    Column("minutes", Integer, nullable=False),
+    Column("offset", Boolean, nullable=False),
+    Column("time_in", Time),
+    Column("time_out", Time),
+    Column("requested_in", Time),
+    Column("requested_out", Time),
+    Column("reason", String(500), nullable=False),
+    Column("decided_by", String(50)),
+    Column("created_at", DateTime, server_default=func.now(), nullable=False),
+    Index("ix_applications_user_date", "user_id", "start_date"),
+    Index("ix_applications_status_kind", "status", "kind"),
+)
+Table(
+    "period_summaries", _v1,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("period", String(7), primary_key=True),
+    Column("minutes_worked", Integer, nullable=False),
+    Column("overtime_minutes", Integer, nullable=False),
+    Column("leave_days", Integer, nullable=False),
+    Column("time_log_count", Integer, nullable=False),
+    Index("ix_period_summaries_period_user", "period", "user_id"),
+)
+
+
+def _baseline(conn):
+    # checkfirst: also adopts databases created by the old create_all-at-import
+    _v1.create_all(bind=conn)
+
+
+# (version, migration(conn)) in order; append new steps, never edit old ones
+MIGRATIONS = [
+    (1, _baseline),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table(models.SchemaVersion.__tablename__):
+        return 0
+    version = conn.execute(
+        select(models.SchemaVersion.version).where(models.SchemaVersion.id == 1)
+    ).scalar()
+    return version or 0
+
+
+def check_schema(conn) -> int:
+    """Raise SchemaOutOfDate unless the DB is at SCHEMA_VERSION."""
+    version = current_version(conn)
+    if version != SCHEMA_VERSION:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {version}, the app needs {SCHEMA_VERSION}; "
+            "run `python -m backend.migrate`"
+        )
+    return version
+
+
+def migrate_connection(conn) -> int:
+    """Apply pending migrations on an open connection (inside a transaction)."""
+    version = current_version(conn)
+    if version > SCHEMA_VERSION:
+        raise SchemaOutOfDate(
+            f"Database schema version {version} is newer than this app ({SCHEMA_VERSION})"
+        )
+    for step_version, step in MIGRATIONS:
+        if step_version > version:
+            step(conn)
+            version = step_version
+    table = models.SchemaVersion.__table__
+    if conn.execute(select(table.c.id).where(table.c.id == 1)).first():
+        conn.execute(table.update().where(table.c.id == 1).values(version=version))
+    else:
+        conn.execute(table.insert().values(id=1, version=version))
+    return version
+
+
+def migrate(engine) -> int:
+    with engine.begin() as conn:
+        return migrate_connection(conn)
+
+
+def main():
+    from backend.database import get_engine
+
+    parser = argparse.ArgumentParser(description="Apply or check database schema migrations")
+    parser.add_argument("--check", action="store_true", help="only check, exit 1 if behind")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    try:
+        if args.check:
+            with engine.connect() as conn:
+                try:
+                    print(f"Schema version {check_schema(conn)} (up to date)")
+                except SchemaOutOfDate as e:
+                    print(e, file=sys.stderr)
+                    sys.exit(1)
+        else:
+            print(f"Schema at version {migrate(engine)}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
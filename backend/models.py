@@ -1,7 +1,17 @@
 # backend/models.py
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, String, Table, Time, func
+)
+from sqlalchemy.orm import relationship
 from backend.database import Base
 
+class SchemaVersion(Base):
+    """Single row (id=1) holding the applied schema version, see backend/migrate.py."""
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -9,3 +19,88 @@ class User(Base):
     username = Column(String(50), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     role = Column(String(20), default="user", nullable=False)
+
+# ===== Roles & Permissions =====
+# User.role holds the Role.name (same length), so existing tokens/rows keep working
+role_permissions = Table(
+    "role_permissions",
+    Base.metadata,
+    Column("role_id", Integer, ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True),
+    Column("permission_id", Integer, ForeignKey("permissions.id", ondelete="CASCADE"), primary_key=True),
+)
+
+class Role(Base):
+    __tablename__ = "roles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(20), unique=True, index=True, nullable=False)
+    description = Column(String(255), default="", nullable=False)
+    modified_by = Column(String(50), default="System", nullable=False)
+    permissions = relationship("Permission", secondary=role_permissions, lazy="selectin")
+
+class Permission(Base):
+    __tablename__ = "permissions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String(50), unique=True, index=True, nullable=False)
+    description = Column(String(255), default="", nullable=False)
+
+class CacheVersion(Base):
+    """Version counters that workers poll to know when to reload in-memory caches."""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+
+# ===== Time logs & Applications (modules/apply) =====
+class TimeLog(Base):
+    __tablename__ = "time_logs"
+    __table_args__ = (Index("ix_time_logs_user_date", "user_id", "work_date"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    work_date = Column(Date, nullable=False)
+    time_in = Column(Time, nullable=False)
+    time_out = Column(Time, nullable=False)
+    minutes_worked = Column(Integer, nullable=False)  # computed on write
+    reason = Column(String(255), default="", nullable=False)
+
+class Application(Base):
+    """Leave, overtime, work on rest day/holiday and change-schedule requests."""
+    __tablename__ = "applications"
+    __table_args__ = (
+        Index("ix_applications_user_date", "user_id", "start_date"),
+        Index("ix_applications_status_kind", "status", "kind"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(20), nullable=False)
+    status = Column(String(20), default="pending", nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    leave_type = Column(String(20))
+    minutes = Column(Integer, default=0, nullable=False)  # overtime / rest day / holiday work
+    offset = Column(Boolean, default=False, nullable=False)
+    time_in = Column(Time)
+    time_out = Column(Time)
+    requested_in = Column(Time)
+    requested_out = Column(Time)
+    reason = Column(String(500), default="", nullable=False)
+    decided_by = Column(String(50))
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+class PeriodSummary(Base):
+    """
+    Per-user rollup kept up to date on every time-log/application write.
+    period is 'YYYY-MM' for a month or 'YYYY' for the whole year.
+    """
+    __tablename__ = "period_summaries"
+    __table_args__ = (Index("ix_period_summaries_period_user", "period", "user_id"),)
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    period = Column(String(7), primary_key=True)
+    minutes_worked = Column(Integer, default=0, nullable=False)
+    overtime_minutes = Column(Integer, default=0, nullable=False)
+    leave_days = Column(Integer, default=0, nullable=False)
+    time_log_count = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,86 @@
+# backend/permissions.py
+import asyncio
+import os
+import time
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from backend import crud
+from backend.database import use_primary
+
+# How often (seconds) a worker checks the roles version row for edits made by other workers
+PERMISSION_CACHE_TTL = float(os.getenv("PERMISSION_CACHE_TTL", "5"))
+
+
+class PermissionCache:
+    """
+    In-process role -> permission set map.
+
+    Per request it is a dict lookup. At most once per `check_interval` one
+    request reads the `cache_versions` row and reloads the map only if another
+    worker bumped it, so role edits propagate within `check_interval` seconds.
+
+    Roles are looked up by id when the token carries one ("rid"), so renaming a
+    role does not lock out tokens issued under the old name. Tokens without
+    "rid" (issued before it was added) fall back to the role name.
+    """
+
+    def __init__(self, session_factory: Callable, check_interval: float = PERMISSION_CACHE_TTL):
+        self.session_factory = session_factory
+        self.check_interval = check_interval
+        self._by_id: Dict[int, Tuple[str, FrozenSet[str]]] = {}
+        self._by_name: Dict[str, FrozenSet[str]] = {}
+        self._ids: Dict[str, int] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Force a version check on the next lookup (after a local role edit)."""
+        self._checked_at = 0.0
+
+    async def _refresh(self):
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return  # another request refreshed while we waited
+            async with self.session_factory() as db:
+                use_primary(db)  # right after a role edit the replica may still be behind
+                version = await crud.get_cache_version_async(db, crud.ROLES_CACHE_KEY)
+                if version != self._version:
+                    by_id = await crud.get_role_permissions_async(db)
+                    self._by_id = by_id
+                    self._by_name = {name: codes for name, codes in by_id.values()}
+                    self._ids = {name: role_id for role_id, (name, _) in by_id.items()}
+                    self._version = version
+            self._checked_at = time.monotonic()
+
+    async def _fresh(self):
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            await self._refresh()
+
+    async def get(self, role: Optional[str], role_id: Optional[int] = None) -> FrozenSet[str]:
+        await self._fresh()
+        if role_id is not None:
+            entry = self._by_id.get(role_id)
+            return entry[1] if entry else frozenset()
+        return self._by_name.get(role or "", frozenset())
+
+    async def for_user(self, payload: dict) -> FrozenSet[str]:
+        """Permissions for a JWT payload (by "rid", else by "role")."""
+        return await self.get(payload.get("role"), payload.get("rid"))
+
+    async def role_id(self, role: str) -> Optional[int]:
+        await self._fresh()
+        return self._ids.get(role)
+
+    def role_name(self, payload: dict) -> Optional[str]:
+        """Current name of the token's role (the token may carry a name from before a rename)."""
+        entry = self._by_id.get(payload.get("rid"))
+        return entry[0] if entry else payload.get("role")
+
+    @property
+    def version(self) -> Optional[int]:
+        """Roles version the current map was loaded at (changes on any role edit)."""
+        return self._version
+
+    def role_names(self) -> List[str]:
+        return sorted(self._by_name)
@@ -0,0 +1,252 @@
+# backend/rate_limit.py
+"""
+Token-bucket admission control for login/register, checked before the captcha,
+the user lookup and bcrypt. Buckets are keyed like "login:ip:1.2.3.4" or
+"login:user:juan". Per-IP buckets pay for every attempt; the per-username bucket
+is only checked up front and paid for by wrong passwords, so nobody can lock an
+account out without guessing passwords.
+
+RATE_LIMIT_STORE=memory keeps buckets per worker; "sqlite" shares them between
+uvicorn workers through a local SQLite file (same idea as CAPTCHA_STORE).
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from backend import metrics
+from backend.local_sqlite import LocalSqlite
+
+# ===== Settings =====
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")  # "memory" | "sqlite"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", os.path.join(BASE_DIR, "ratelimit.db"))
+
+
+@dataclass(frozen=True)
+class Limit:
+    """`burst` attempts at once, refilled at `per_minute` attempts per minute."""
+
+    name: str
+    burst: int
+    per_minute: float
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+def _limit(name: str, burst: str, per_minute: str) -> Limit:
+    env = name.upper().replace(":", "_")
+    return Limit(
+        name,
+        int(os.getenv(f"{env}_BURST", burst)),
+        float(os.getenv(f"{env}_PER_MINUTE", per_minute)),
+    )
+
+
+# e.g. LOGIN_IP_BURST=20, LOGIN_IP_PER_MINUTE=20
+LOGIN_IP = _limit("login:ip", "20", "20")
+LOGIN_USER = _limit("login:user", "5", "5")
+REGISTER_IP = _limit("register:ip", "5", "5")
+
+RATE_LIMIT_CHECKS = metrics.REGISTRY.counter(
+    "rate_limit_checks_total", "Rate limit checks by limit and result.", ("limit", "result")
+)
+
+
+def _refill(tokens: float, updated: float, limit: Limit, now: float) -> float:
+    return min(float(limit.burst), tokens + (now - updated) * limit.rate)
+
+
+def _wait_for_token(tokens: float, limit: Limit) -> float:
+    if tokens >= 1.0:
+        return 0.0
+    return (1.0 - tokens) / limit.rate if limit.rate else math.inf
+
+
+class RateLimiter:
+    """Interface for bucket storage."""
+
+    blocking = False  # see backend.local_sqlite
+
+    def _take(self, key: str, limit: Limit, now: float) -> float:
+        """Take one token; return 0 if allowed, else seconds until one is available."""
+        raise NotImplementedError
+
+    def hit(self, limit: Limit, key: str, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        retry_after = self._take(f"{limit.name}:{key}", limit, now)
+        RATE_LIMIT_CHECKS.inc(limit.name, "rejected" if retry_after else "allowed")
+        return retry_after
+
+    def _peek(self, key: str, limit: Limit, now: float) -> float:
+        """Like _take, but leaves the bucket as it is."""
+        raise NotImplementedError
+
+    def peek(self, limit: Limit, key: str, now: Optional[float] = None) -> float:
+        """0 if `key` has a token left, else seconds until it has one. Takes nothing."""
+        now = time.time() if now is None else now
+        return self._peek(f"{limit.name}:{key}", limit, now)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop buckets that have refilled completely (idle keys), return how many."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+# ===========================
+# In-process buckets (single worker)
+# ===========================
+class MemoryRateLimiter(RateLimiter):
+    """
+    OrderedDict in least-recently-hit order. A bucket that has refilled is the
+    same as no bucket, so idle keys are dropped from the front as we go, and the
+    least recently hit key is evicted when max_keys is reached.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [tokens, updated, full_at, limit]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _take(self, key: str, limit: Limit, now: float) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(limit.burst)
+                self._evict(now)
+            else:
+                tokens = _refill(bucket[0], bucket[1], limit, now)
+                self._buckets.move_to_end(key)
+            if tokens < 1.0:
+                if bucket is not None:
+                    bucket[0], bucket[1] = tokens, now
+                return (1.0 - tokens) / limit.rate if limit.rate else math.inf
+            tokens -= 1.0
+            full_at = now + (limit.burst - tokens) / limit.rate if limit.rate else math.inf
+            if bucket is None:
+                self._buckets[key] = [tokens, now, full_at, limit]
+            else:
+                bucket[0], bucket[1], bucket[2] = tokens, now, full_at
+            return 0.0
+
+    def _peek(self, key: str, limit: Limit, now: float) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = float(limit.burst) if bucket is None else _refill(bucket[0], bucket[1], limit, now)
+        return _wait_for_token(tokens, limit)
+
+    def _evict(self, now: float):
+        # Front = least recently hit; stop at the first bucket that is still refilling
+        buckets = self._buckets
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if oldest[2] > now and len(buckets) < self.max_keys:
+                break
+            buckets.popitem(last=False)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            before = len(self._buckets)
+            self._buckets = OrderedDict((k, b) for k, b in self._buckets.items() if b[2] > now)
+            return before - len(self._buckets)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# ===========================
+# Shared SQLite buckets (multiple uvicorn workers)
+# ===========================
+RATE_LIMIT_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS buckets ("
+    " key TEXT PRIMARY KEY,"
+    " tokens REAL NOT NULL,"
+    " updated REAL NOT NULL,"
+    " full_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_buckets_full_at ON buckets (full_at)",
+)
+
+
+class SqliteRateLimiter(RateLimiter):
+    """
+    Buckets in a local SQLite file so every worker sees the same counts.
+    Each hit is one short write transaction; full buckets are deleted via the
+    index on `full_at` every `sweep_every` hits.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str = RATE_LIMIT_DB_PATH, max_keys: int = RATE_LIMIT_MAX_KEYS,
+                 sweep_every: int = 1000):
+        self.max_keys = max_keys
+        self.sweep_every = sweep_every
+        self._hits = 0
+        self._db = LocalSqlite(path, RATE_LIMIT_SCHEMA)
+
+    def _take(self, key: str, limit: Limit, now: float) -> float:
+        conn = self._db.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(row[0], row[1], limit, now) if row else float(limit.burst)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            full_at = now + (limit.burst - tokens) / limit.rate if limit.rate else math.inf
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens,"
+                " updated = excluded.updated, full_at = excluded.full_at",
+                (key, tokens, now, full_at),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._hits += 1
+        if self._hits % self.sweep_every == 0:
+            self.sweep(now)
+        if allowed:
+            return 0.0
+        return (1.0 - tokens) / limit.rate if limit.rate else math.inf
+
+    def _peek(self, key: str, limit: Limit, now: float) -> float:
+        row = self._db.conn().execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+        tokens = _refill(row[0], row[1], limit, now) if row else float(limit.burst)
+        return _wait_for_token(tokens, limit)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        conn = self._db.conn()
+        removed = conn.execute("DELETE FROM buckets WHERE full_at <= ?", (now,)).rowcount
+        # Still over the cap: drop the buckets closest to full
+        excess = len(self) - self.max_keys
+        if excess > 0:
+            removed += conn.execute(
+                "DELETE FROM buckets WHERE key IN (SELECT key FROM buckets ORDER BY full_at LIMIT ?)", (excess,)
+            ).rowcount
+        return removed
+
+    def __len__(self) -> int:
+        return self._db.conn().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+
+def create_rate_limiter(kind: str = RATE_LIMIT_STORE) -> RateLimiter:
+    if kind == "sqlite":
+        return SqliteRateLimiter()
+    if kind == "memory":
+        return MemoryRateLimiter()
+    raise ValueError(f"Unknown RATE_LIMIT_STORE: {kind}")
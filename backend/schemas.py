@@ -1,6 +1,7 @@
 # backend/schemas.py
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import date, datetime, time
 
 # ===== Captcha =====
 class CaptchaResponse(BaseModel):
@@ -13,7 +14,7 @@ class UserBase(BaseModel):
 
 class UserCreate(UserBase):
     password: str
-    role: Optional[str] = "user"
+    role: Optional[str] = None  # "user" unless the caller holds users:write
 
 class User(UserBase):
     id: int
@@ -22,6 +23,118 @@ class User(UserBase):
     class Config:  # ✅ mas standard kaysa model_config
         from_attributes = True
 
+class UserPage(BaseModel):
+    items: List[User]
+    next_cursor: Optional[str] = None
+
+class UserSearchResult(BaseModel):
+    items: List[User]
+    source: str  # "index" | "database" (index still building)
+
+# ===== Roles & Permissions =====
+class PermissionBase(BaseModel):
+    code: str = Field(..., min_length=1, max_length=50)  # permissions.code is String(50)
+    description: Optional[str] = Field("", max_length=255)
+
+class PermissionCreate(PermissionBase):
+    pass
+
+class Permission(PermissionBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+class RoleBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=20)  # roles.name and users.role are String(20)
+    description: Optional[str] = Field("", max_length=255)
+
+class RoleCreate(RoleBase):
+    permissions: List[str] = []  # permission codes
+
+class RoleUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=20)
+    description: Optional[str] = Field(None, max_length=255)
+    permissions: Optional[List[str]] = None
+
+class Role(RoleBase):
+    id: int
+    modified_by: str
+    permissions: List[str]
+
+# ===== Time logs =====
+class TimeLogBase(BaseModel):
+    work_date: date
+    time_in: time
+    time_out: time
+    reason: Optional[str] = Field("", max_length=255)  # time_logs.reason is String(255)
+
+class TimeLogCreate(TimeLogBase):
+    pass
+
+class TimeLogBatch(BaseModel):
+    entries: List[TimeLogCreate] = Field(..., min_length=1, max_length=1000)
+
+class TimeLog(TimeLogBase):
+    id: int
+    user_id: int
+    minutes_worked: int
+
+    class Config:
+        from_attributes = True
+
+# ===== Applications (leave, overtime, rest day, holiday, change schedule) =====
+ApplicationKind = Literal["leave", "overtime", "work_restday", "work_holiday", "change_schedule"]
+
+class ApplicationCreate(BaseModel):
+    kind: ApplicationKind
+    start_date: date
+    end_date: Optional[date] = None  # defaults to start_date
+    leave_type: Optional[str] = Field(None, max_length=20)
+    minutes: Optional[int] = Field(0, ge=0)
+    offset: Optional[bool] = False
+    time_in: Optional[time] = None
+    time_out: Optional[time] = None
+    requested_in: Optional[time] = None
+    requested_out: Optional[time] = None
+    reason: Optional[str] = Field("", max_length=500)  # applications.reason is String(500)
+
+class ApplicationDecision(BaseModel):
+    status: Literal["approved", "rejected"]
+
+class Application(BaseModel):
+    id: int
+    user_id: int
+    kind: str
+    status: str
+    start_date: date
+    end_date: date
+    leave_type: Optional[str] = None
+    minutes: int
+    offset: bool
+    time_in: Optional[time] = None
+    time_out: Optional[time] = None
+    requested_in: Optional[time] = None
+    requested_out: Optional[time] = None
+    reason: str
+    decided_by: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class PeriodSummary(BaseModel):
+    user_id: int
+    period: str
+    minutes_worked: int = 0
+    overtime_minutes: int = 0
+    leave_days: int = 0
+    time_log_count: int = 0
+    leave_balance: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
 # ===== Login =====
 class LoginRequest(BaseModel):
     username: str
@@ -0,0 +1,272 @@
+# backend/search.py
+"""
+In-memory typeahead index over usernames (with role filter) for /api/users/search.
+
+- Queries of 1-2 characters match username prefixes only, through a sorted list of
+  lowercased usernames (prefix bisect); the SQL fallback does the same.
+- Longer queries also use the posting lists of the query's rarest trigrams (intersected
+  when short) and check each candidate with a plain substring test, stopping once
+  `limit` matches are found.
+
+Ranking: exact match, then prefix matches, then substring matches (earlier match
+position first), shorter usernames first within each group.
+
+Built on startup from the users table and kept current by crud's create/update/delete
+helpers. Each uvicorn worker has its own copy and only sees its own writes; set
+SEARCH_INDEX_REBUILD_SECONDS to rebuild periodically when running several workers.
+A rebuild loads a fresh index in a worker thread and swaps it in when done, so the
+live index keeps answering (memory peaks at two copies while it runs).
+"""
+import asyncio
+import bisect
+import os
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# ===== Settings =====
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "1") == "1"
+SEARCH_INDEX_REBUILD_SECONDS = float(os.getenv("SEARCH_INDEX_REBUILD_SECONDS", "0"))  # 0 = never
+# Upper bound on candidates checked per query (worst case for very common trigrams)
+SEARCH_MAX_SCAN = int(os.getenv("SEARCH_MAX_SCAN", "20000"))
+# Intersect the two rarest posting lists first when together they hold at most this many ids
+SEARCH_INTERSECT_MAX = int(os.getenv("SEARCH_INTERSECT_MAX", "8192"))
+# Shorter queries have no trigram, so they only match prefixes (index and SQL fallback alike)
+SUBSTRING_MIN_CHARS = 3
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class UserSearchIndex:
+    def __init__(self):
+        # id -> (username, lowercased username, role)
+        self._users: Dict[int, Tuple[str, str, str]] = {}
+        # Sorted lowercased usernames (duplicates allowed: "Juan" and "juan" are different users)
+        self._sorted: List[str] = []
+        # Tuples, not lists: the GC stops tracking tuples of ints, a million small lists
+        # would make every full collection crawl (duplicates are rare, so rebuilding is cheap)
+        self._ids_by_lower: Dict[str, Tuple[int, ...]] = {}
+        # trigram -> user ids; removals are lazy (ids are re-checked at query time)
+        self._postings: Dict[str, array] = {}
+        self._stale = 0
+        self._lock = threading.RLock()
+        self.ready = False
+        self._building = False
+        # Writes seen while a replacement is being built, replayed onto it before the swap
+        self._replay: Optional[List[tuple]] = None
+
+    # ----- updates -----
+    def add(self, user_id: int, username: str, role: str):
+        """Insert or replace a user."""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("add", user_id, username, role))
+            self._add(user_id, username, role)
+
+    def _add(self, user_id: int, username: str, role: str):
+        old = self._users.get(user_id)
+        if old is not None:
+            if old[0] == username:
+                self._users[user_id] = (old[0], old[1], role)
+                return
+            self._remove(user_id)
+        lower = username.lower()
+        if lower == username:
+            lower = username  # share the string object
+        self._users[user_id] = (username, lower, role)
+        if self._building:
+            self._sorted.append(lower)  # sorted once in finish_build
+        else:
+            bisect.insort(self._sorted, lower)
+        self._ids_by_lower[lower] = self._ids_by_lower.get(lower, ()) + (user_id,)
+        for gram in trigrams(lower):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("q")
+            postings.append(user_id)
+
+    def remove(self, user_id: int):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("remove", user_id))
+            self._remove(user_id)
+            if self._stale > max(10000, len(self._users) // 4):
+                self._compact()
+
+    def _remove(self, user_id: int):
+        old = self._users.pop(user_id, None)
+        if old is None:
+            return
+        lower = old[1]
+        if self._building:
+            self._sorted.remove(lower)
+        else:
+            index = bisect.bisect_left(self._sorted, lower)
+            if index < len(self._sorted) and self._sorted[index] == lower:
+                del self._sorted[index]
+        ids = tuple(i for i in self._ids_by_lower.get(lower, ()) if i != user_id)
+        if ids:
+            self._ids_by_lower[lower] = ids
+        else:
+            self._ids_by_lower.pop(lower, None)
+        self._stale += len(trigrams(lower))
+
+    def rename_role(self, old: str, new: str):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("rename_role", old, new))
+            for user_id, (username, lower, role) in list(self._users.items()):
+                if role == old:
+                    self._users[user_id] = (username, lower, new)
+
+    def _compact(self):
+        postings: Dict[str, array] = {}
+        for user_id, (_, lower, _) in self._users.items():
+            for gram in trigrams(lower):
+                bucket = postings.get(gram)
+                if bucket is None:
+                    bucket = postings[gram] = array("q")
+                bucket.append(user_id)
+        self._postings = postings
+        self._stale = 0
+
+    # ----- bulk build (on a fresh index nobody else is using yet) -----
+    def begin_build(self):
+        with self._lock:
+            self._building = True
+            self._users, self._sorted, self._ids_by_lower, self._postings = {}, [], {}, {}
+            self._stale = 0
+            self.ready = False
+
+    def load(self, rows: Iterable[dict]):
+        """Bulk-add rows during a build."""
+        with self._lock:
+            for row in rows:
+                self._add(row["id"], row["username"], row["role"])
+
+    def finish_build(self):
+        with self._lock:
+            self._sorted.sort()
+            self._building = False
+            self.ready = True
+
+    # ----- swapping in a rebuilt index -----
+    def begin_capture(self):
+        """Start recording writes for replay onto a replacement (see swap_in)."""
+        with self._lock:
+            self._replay = []
+
+    def end_capture(self):
+        with self._lock:
+            self._replay = None
+
+    def swap_in(self, fresh: "UserSearchIndex"):
+        """Replay writes made since begin_capture onto `fresh`, then take over its contents."""
+        with self._lock:
+            for op, *op_args in self._replay or ():
+                getattr(fresh, op)(*op_args)
+            self._users, self._sorted = fresh._users, fresh._sorted
+            self._ids_by_lower, self._postings = fresh._ids_by_lower, fresh._postings
+            self._stale = fresh._stale
+            self._replay = None
+            self.ready = True
+
+    # ----- queries -----
+    def search(self, query: str, limit: int = 10, role: Optional[str] = None) -> List[dict]:
+        q = query.strip().lower()
+        if not q:
+            return []
+        users = self._users
+        found: Dict[int, Tuple[int, int, int, str]] = {}  # id -> rank key
+
+        def consider(user_id: int) -> bool:
+            entry = users.get(user_id)
+            if entry is None or user_id in found or (role is not None and entry[2] != role):
+                return False
+            position = entry[1].find(q)
+            if position < 0:
+                return False
+            group = 0 if entry[1] == q else (1 if position == 0 else 2)
+            found[user_id] = (group, position, len(entry[1]), entry[1])
+            return True
+
+        with self._lock:
+            # Prefix matches (includes exact) straight from the sorted list
+            sorted_names = self._sorted
+            i = bisect.bisect_left(sorted_names, q)
+            end = min(len(sorted_names), i + SEARCH_MAX_SCAN)
+            scanned = 0
+            while i < end and len(found) < limit and sorted_names[i].startswith(q):
+                lower = sorted_names[i]
+                for user_id in self._ids_by_lower.get(lower, ()):
+                    scanned += 1
+                    consider(user_id)
+                i += 1
+
+            # Substring matches through the rarest trigrams of the query
+            if len(found) < limit and len(q) >= SUBSTRING_MIN_CHARS:
+                postings = sorted((self._postings.get(g, ()) for g in trigrams(q)), key=len)
+                candidates = postings[0]
+                if len(postings) > 1 and len(candidates) + len(postings[1]) <= SEARCH_INTERSECT_MAX:
+                    # Cheaper in C than checking every id of the rarest list in Python
+                    candidates = set(candidates).intersection(postings[1])
+                for user_id in candidates:
+                    if len(found) >= limit or scanned >= SEARCH_MAX_SCAN:
+                        break
+                    scanned += 1
+                    consider(user_id)
+
+            ranked = sorted(found, key=found.__getitem__)[:limit]
+            return [{"id": i, "username": users[i][0], "role": users[i][2]} for i in ranked]
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+USER_INDEX = UserSearchIndex()
+
+
+# ===== Hooks called by crud after a user write is committed =====
+def index_user(user_id: int, username: str, role: str):
+    if SEARCH_INDEX_ENABLED:
+        USER_INDEX.add(user_id, username, role)
+
+
+def unindex_user(user_id: int):
+    if SEARCH_INDEX_ENABLED:
+        USER_INDEX.remove(user_id)
+
+
+def rename_role(old: str, new: str):
+    if SEARCH_INDEX_ENABLED:
+        USER_INDEX.rename_role(old, new)
+
+
+async def build_index(db, index: UserSearchIndex = USER_INDEX, chunk_size: int = 1000):
+    """
+    (Re)build from the users table, one keyset chunk at a time (small chunks: the
+    rows are fetched on the event loop). Rows are indexed in a worker thread into a
+    fresh index, which then replaces `index`'s contents; `index` keeps serving
+    searches (and taking writes) until the swap.
+    """
+    from backend import crud
+
+    fresh = UserSearchIndex()
+    fresh.begin_build()
+    index.begin_capture()
+    try:
+        chunk: List[dict] = []
+        async for row in crud.iter_users_async(db, chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                await asyncio.to_thread(fresh.load, chunk)
+                chunk = []
+        await asyncio.to_thread(fresh.load, chunk)
+        await asyncio.to_thread(fresh.finish_build)
+    except BaseException:
+        index.end_capture()
+        raise
+    index.swap_in(fresh)
+    return len(index)
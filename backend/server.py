@@ -1,33 +1,114 @@
 # backend/server.py
 import uvicorn
+import asyncio
+import hashlib
+import io
+import json
+import math
+import tempfile
 import time, uuid, random, string, jwt, os
-from typing import Optional
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import List, Optional
 import logging
 
-from fastapi import FastAPI, HTTPException, Response, Cookie, Depends
+from fastapi import FastAPI, HTTPException, Query, Request, Response, Cookie, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Absolute imports
-from backend import crud, models, schemas
-from backend.database import SessionLocal, engine
+from backend import bulk_import, crud, logging_setup, menu, metrics, migrate, rate_limit, schemas, search
+from backend.assets import AssetStore, asset_response
+from backend.auth import VerifiedTokenCache, create_revoked_tokens, token_digest
+from backend.captcha_store import CAPTCHA_SWEEP_INTERVAL, CAPTCHA_TTL, create_captcha_store
+from backend.database import (
+    ASYNC_DATABASE_REPLICA_URL, REPLICA_STICKY_SECONDS, AsyncSessionLocal,
+    dispose_engines, get_async_engine, use_primary,
+)
+from backend.permissions import PermissionCache
+from sqlalchemy.exc import IntegrityError
 
 # ===== Settings =====
 SECRET_KEY = "change_this_secret_in_production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE = 60 * 60 * 24  # 1 day
 ENV = os.getenv("ENV", "development")  # dev-only bypass
+# Apply pending migrations on startup instead of failing (dev default; use `python -m backend.migrate` in prod)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1" if ENV == "development" else "0") == "1"
+
+# ===== Lifecycle =====
+# Importing this module never touches the DB or the filesystem; all of that happens here.
+async def check_schema():
+    engine = get_async_engine()
+    async with engine.connect() as conn:
+        try:
+            await conn.run_sync(migrate.check_schema)
+            return
+        except migrate.SchemaOutOfDate:
+            if not AUTO_MIGRATE:
+                raise
+    async with engine.begin() as conn:
+        version = await conn.run_sync(migrate.migrate_connection)
+    logger.info("Schema migrated to version %s", version)
+
+async def seed_roles():
+    async with AsyncSessionLocal() as db:
+        try:
+            await crud.seed_roles_async(db)
+        except IntegrityError:
+            # Another worker seeded at the same time
+            await db.rollback()
+
+async def build_search_index():
+    """Initial build, then optional periodic rebuilds (other workers' writes)."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                count = await search.build_index(db)
+            logger.info("User search index built: %s users", count)
+        except Exception:
+            logger.exception("User search index build failed")
+        if search.SEARCH_INDEX_REBUILD_SECONDS <= 0:
+            return
+        await asyncio.sleep(search.SEARCH_INDEX_REBUILD_SECONDS)
 
-# Create DB tables
-models.Base.metadata.create_all(bind=engine)
+async def sweep_captchas_forever():
+    while True:
+        await asyncio.sleep(CAPTCHA_SWEEP_INTERVAL)
+        try:
+            await run_in_threadpool(CAPTCHAS.sweep)
+        except Exception:
+            logger.exception("Captcha sweep failed")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logging_setup.configure_logging()
+    await check_schema()
+    await seed_roles()
+    await run_in_threadpool(ASSETS.build)
+    app.state.captcha_sweeper = asyncio.create_task(sweep_captchas_forever())
+    # Built in the background; /api/users/search falls back to SQL until it is ready
+    app.state.search_indexer = (
+        asyncio.create_task(build_search_index()) if search.SEARCH_INDEX_ENABLED else None
+    )
+    try:
+        yield
+    finally:
+        app.state.captcha_sweeper.cancel()
+        if app.state.search_indexer:
+            app.state.search_indexer.cancel()
+        crud.shutdown_hash_executor()
+        await dispose_engines()
+        logging_setup.stop_logging()
 
-# ===== Logging setup =====
-logging.basicConfig(level=logging.DEBUG)
+app = FastAPI(lifespan=lifespan)
+
+# ===== Logging setup (configured on startup, see backend/logging_setup.py) =====
 logger = logging.getLogger(__name__)
+# High-volume captcha/login debug events; sample with LOG_SAMPLING=backend.server.auth=0.01
+auth_logger = logging.getLogger("backend.server.auth")
 
 # ===== CORS setup =====
 app.add_middleware(
@@ -41,96 +122,283 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ===== Dependencies =====
-def get_db():
-    db = SessionLocal()
+# ===== Request metrics / request id =====
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    # Reuse the caller's id (proxy, load balancer) if it looks sane
+    request_id = request.headers.get("x-request-id", "")
+    if not (0 < len(request_id) <= 64 and request_id.isprintable()):
+        request_id = uuid.uuid4().hex
+    token = logging_setup.request_id_var.set(request_id)
     try:
-        yield db
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
     finally:
-        db.close()
+        logging_setup.request_id_var.reset(token)
+        # Label by route template (e.g. /modules, /api/login), not the raw URL
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - start, route_path, request.method)
+        metrics.HTTP_REQUESTS.inc(route_path, request.method, str(status))
 
-# ===== In-memory captcha storage =====
-CAPTCHAS = {}
+# ===== Replica stickiness cookie (other workers don't see this worker's RECENT_WRITERS) =====
+@app.middleware("http")
+async def replica_sticky_cookie(request: Request, call_next):
+    response = await call_next(request)
+    if REPLICA_ROUTING and any(info.get("committed_write") for info in getattr(request.state, "db_infos", ())):
+        response.set_cookie(
+            STICKY_COOKIE, "1", max_age=max(1, math.ceil(REPLICA_STICKY_SECONDS)), httponly=True, samesite="lax"
+        )
+    return response
+
+# ===== Dependencies =====
+REPLICA_ROUTING = bool(ASYNC_DATABASE_REPLICA_URL)
+# Set after a request commits a write; any worker sends this client's reads to the primary while it lasts
+STICKY_COOKIE = "db_primary"
+
+async def get_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        if REPLICA_ROUTING:
+            # Read-your-writes across requests: pin this client to the primary after it commits
+            if request.cookies.get(STICKY_COOKIE):
+                use_primary(db)
+            token = request.cookies.get("access_token")
+            db.info["sticky_key"] = token_digest(token) if token else client_ip(request)
+            request.state.db_infos = getattr(request.state, "db_infos", []) + [db.info]
+        yield db
+
+# ===== Shared stores (captchas, rate limits, revoked tokens) =====
+async def call_store(store, fn, *args):
+    """Call `fn(*args)` on `store`, off the event loop when the store is blocking (SQLite-backed)."""
+    if store.blocking:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+# ===== Captcha storage (memory or shared SQLite, see CAPTCHA_STORE) =====
+CAPTCHAS = create_captcha_store()
+
+# ===== Login/register admission control (memory or shared SQLite, see RATE_LIMIT_STORE) =====
+LIMITER = rate_limit.create_rate_limiter()
+metrics.REGISTRY.gauge("rate_limit_keys", "Rate limit buckets currently tracked.", lambda: len(LIMITER))
+
+async def check_rate_limit(limit: rate_limit.Limit, key: str, take: bool = True):
+    """
+    Raise 429 when `key` is over `limit`. Runs before the captcha, DB and bcrypt.
+    take=False only checks; the caller charges the attempt later with charge_rate_limit.
+    """
+    if not rate_limit.RATE_LIMIT_ENABLED:
+        return
+    retry_after = await call_store(LIMITER, LIMITER.hit if take else LIMITER.peek, limit, key)
+    if retry_after:
+        auth_logger.info("Rate limited %s key=%s", limit.name, key)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many attempts, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+async def charge_rate_limit(limit: rate_limit.Limit, key: str):
+    """Spend one token without rejecting (the attempt already happened)."""
+    if rate_limit.RATE_LIMIT_ENABLED:
+        await call_store(LIMITER, LIMITER.hit, limit, key)
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
 
 # ===== Helpers =====
-def validate_captcha(cid: Optional[str], input_word: str):
-    logger.debug("validate_captcha called with cid=%s input=%s", cid, input_word)
+async def validate_captcha(cid: Optional[str], input_word: str):
+    # Never log the captcha word or the user's answer
+    auth_logger.debug("validate_captcha called with cid=%s", cid)
 
     # Dev-only ADMIN bypass
     if ENV == "development" and input_word and input_word.strip().upper() == "ADMIN":
-        logger.debug("ADMIN bypass accepted (dev mode)")
+        auth_logger.debug("ADMIN bypass accepted (dev mode)")
         return True
 
     if not cid:
         return False
-    item = CAPTCHAS.get(cid)
+    # One-shot: a captcha is consumed by the first attempt that uses it
+    item = await call_store(CAPTCHAS, CAPTCHAS.pop, cid)
     if not item:
         return False
     stored_word, expiry = item
     if time.time() > expiry:
-        CAPTCHAS.pop(cid, None)
         return False
     return input_word.strip().upper() == stored_word.strip().upper()
 
 def decode_token(access_token: str):
     return jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
 
-# ===== Serve Frontend (HTML, CSS, JS) =====
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-MODULES_DIR = os.path.join(BASE_DIR, "modules")
-app.mount("/modules", StaticFiles(directory=MODULES_DIR), name="modules")
-
-@app.get("/")
-async def root():
-    return FileResponse(os.path.join(MODULES_DIR, "login", "login.html"))
+# ===== Auth dependency =====
+TOKEN_CACHE = VerifiedTokenCache()
+# Logouts (memory or shared SQLite, see REVOKED_TOKEN_STORE)
+REVOKED_TOKENS = create_revoked_tokens()
 
-# ===== Secure dashboard route =====
-@app.get("/dashboard")
-def get_dashboard(access_token: Optional[str] = Cookie(default=None)):
+async def get_current_user(access_token: Optional[str] = Cookie(default=None)) -> dict:
+    """
+    Returns the JWT payload for the cookie token.
+    Verified tokens are cached by digest, so repeat requests skip the HMAC check.
+    """
     if not access_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
+    digest = token_digest(access_token)
+    if REVOKED_TOKENS.needs_sync():
+        await run_in_threadpool(REVOKED_TOKENS.sync)
+    if REVOKED_TOKENS.is_revoked(digest):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    payload = TOKEN_CACHE.get(digest)
+    if payload is not None:
+        return payload
     try:
-        decode_token(access_token)
-        return FileResponse(os.path.join(MODULES_DIR, "dashboard", "dashboard.html"))
+        payload = decode_token(access_token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+    TOKEN_CACHE.put(digest, payload)
+    return payload
+
+async def get_optional_user(access_token: Optional[str] = Cookie(default=None)) -> Optional[dict]:
+    """JWT payload when a valid cookie is sent, else None (public routes)."""
+    if not access_token:
+        return None
+    try:
+        return await get_current_user(access_token)
+    except HTTPException:
+        return None
+
+def hasher_busy():
+    return HTTPException(
+        status_code=503,
+        detail="Server busy, please try again",
+        headers={"Retry-After": "1"},
+    )
+
+async def get_current_user_id(
+    current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> int:
+    # Tokens issued before "uid" was added only carry the username
+    if current_user.get("uid") is not None:
+        return current_user["uid"]
+    user = await crud.get_user_by_username_async(db, current_user.get("sub"))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user.id
+
+# ===== Authorization =====
+PERMISSIONS = PermissionCache(AsyncSessionLocal)
+
+def require_permission(code: str):
+    """Dependency factory: 403 unless the user's role grants `code`."""
+    async def check_permission(current_user: dict = Depends(get_current_user)) -> dict:
+        if code not in await PERMISSIONS.for_user(current_user):
+            raise HTTPException(status_code=403, detail="Not allowed")
+        return current_user
+    return check_permission
+
+# ===== Serve Frontend (HTML, CSS, JS) =====
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES_DIR = os.path.join(BASE_DIR, "modules")
+
+# Hashed, precompressed, in-memory assets (see backend/assets.py)
+ASSETS = AssetStore(MODULES_DIR)  # built on startup (or on first request)
+
+async def serve_asset(request: Request, rel_path: str) -> Response:
+    # A (re)build reads, hashes and gzips all of modules/: keep it off the event loop
+    if ASSETS.needs_build(rel_path):
+        await run_in_threadpool(ASSETS.build)
+    asset = ASSETS.get(rel_path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return asset_response(request, asset)
+
+@app.api_route("/modules/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def modules_static(path: str, request: Request):
+    return await serve_asset(request, path)
+
+@app.get("/")
+async def root(request: Request):
+    return await serve_asset(request, "login/login.html")
+
+# ===== Secure dashboard route =====
+@app.get("/dashboard")
+async def get_dashboard(request: Request, current_user: dict = Depends(get_current_user)):
+    return await serve_asset(request, "dashboard/dashboard.html")
 
 # ===== API Routes =====
 @app.get("/api/captcha", response_model=schemas.CaptchaResponse)
 def get_captcha():
     word = "".join(random.choices(string.ascii_uppercase + string.digits, k=5))
     cid = str(uuid.uuid4())
-    CAPTCHAS[cid] = (word, time.time() + 300)
-    logger.debug("Captcha generated: id=%s word=%s", cid, word)
+    CAPTCHAS.put(cid, word, time.time() + CAPTCHA_TTL)
+    auth_logger.debug("Captcha generated: id=%s", cid)
     return {"id": cid, "word": word}
 
 @app.post("/api/register", response_model=schemas.User)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_username(db, user.username)
+async def register(
+    user: schemas.UserCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_optional_user),
+):
+    await check_rate_limit(rate_limit.REGISTER_IP, client_ip(request))
+    # Self-registration always gets "user"; only users:write holders may pick an existing role
+    role = user.role or "user"
+    if role != "user":
+        if current_user is None or "users:write" not in await PERMISSIONS.for_user(current_user):
+            raise HTTPException(status_code=403, detail="Not allowed to assign a role")
+        if not await crud.get_role_by_name_async(db, role):
+            raise HTTPException(status_code=400, detail=f"Unknown role '{role}'")
+    user = user.model_copy(update={"role": role})
+    db_user = await crud.get_user_by_username_async(db, user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    return crud.create_user(db=db, user=user)  # hashing done inside crud
+    try:
+        hashed_pw = await crud.hash_password(user.password)
+    except crud.PasswordHasherBusy:
+        raise hasher_busy()
+    return await crud.create_user_async(db, user, hashed_password=hashed_pw)
 
 # ===== LOGIN ENDPOINT =====
 @app.post("/api/login")
-def login(req: schemas.LoginRequest, response: Response, db: Session = Depends(get_db)):
-    logger.debug("Login attempt for username=%s", req.username)
+async def login(req: schemas.LoginRequest, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    auth_logger.debug("Login attempt for username=%s", req.username)
+
+    # 0️⃣ Per-IP attempt budget (cheap; before anything that costs CPU or a query)
+    await check_rate_limit(rate_limit.LOGIN_IP, client_ip(request))
 
     # 1️⃣ Validate captcha
-    if not validate_captcha(req.captcha_id, req.captcha):
+    if not await validate_captcha(req.captcha_id, req.captcha):
         raise HTTPException(status_code=400, detail="Captcha invalid or expired")
 
+    # Per-username budget: checked here, only spent by wrong passwords (no lockout by captcha spam)
+    user_key = req.username.strip().lower()[:150]
+    await check_rate_limit(rate_limit.LOGIN_USER, user_key, take=False)
+
     # 2️⃣ Verify username & password using crud helper
-    user = crud.get_user_by_username(db, req.username)
-    if not user or not crud.verify_password(req.password, user.hashed_password):
+    user = await crud.get_user_by_username_async(db, req.username)
+    if not user:
+        await charge_rate_limit(rate_limit.LOGIN_USER, user_key)
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+    try:
+        password_ok = await crud.verify_password(req.password, user.hashed_password)
+    except crud.PasswordHasherBusy:
+        raise hasher_busy()
+    if not password_ok:
+        await charge_rate_limit(rate_limit.LOGIN_USER, user_key)
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     # 3️⃣ Create JWT token
     payload = {
         "sub": user.username,
+        "uid": user.id,
         "role": user.role,
+        # Permissions are looked up by role id, so a role rename keeps this token working
+        "rid": await PERMISSIONS.role_id(user.role),
         "iat": int(time.time()),
         "exp": int(time.time()) + (60 * 60 * 24 * 30 if req.remember else ACCESS_TOKEN_EXPIRE)
     }
@@ -149,23 +417,326 @@ def login(req: schemas.LoginRequest, response: Response, db: Session = Depends(g
     return {"msg": "ok", "role": user.role}
 
 @app.post("/api/logout")
-def logout(response: Response):
+async def logout(response: Response, access_token: Optional[str] = Cookie(default=None)):
+    # Revoke server-side so the token stops working even if the cookie is kept
+    if access_token:
+        try:
+            payload = decode_token(access_token)
+        except Exception:
+            payload = None
+        if payload is not None:
+            digest = token_digest(access_token)
+            await call_store(REVOKED_TOKENS, REVOKED_TOKENS.revoke, digest, payload.get("exp", 0))
+            TOKEN_CACHE.discard(digest)
     response.delete_cookie("access_token")
     return {"msg": "Logged out"}
 
 @app.get("/api/dashboard")
-def dashboard_data(access_token: Optional[str] = Cookie(default=None)):
-    if not access_token:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+async def dashboard_data(current_user: dict = Depends(get_current_user)):
+    return {"username": current_user.get("sub"), "role": PERMISSIONS.role_name(current_user)}
+
+# ===== Page bootstrap (identity + menu + roles in one call) =====
+@app.get("/api/bootstrap")
+async def bootstrap(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Everything a page needs on load. The ETag covers the user, their role, the
+    roles/permissions version and the menu catalog, so a repeat load is a 304
+    decided from cached state only.
+    """
+    permissions = await PERMISSIONS.for_user(current_user)
+    role = PERMISSIONS.role_name(current_user)
+    key = f"{current_user.get('uid')}|{current_user.get('sub')}|{role}|{PERMISSIONS.version}|{menu.MENU_VERSION}"
+    etag = '"%s"' % hashlib.sha256(key.encode()).hexdigest()[:16]
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(
+        {
+            "user": {"id": current_user.get("uid"), "username": current_user.get("sub")},
+            "role": role,
+            "permissions": sorted(permissions),
+            "modules": menu.menu_for(permissions),
+            # Role names only for those who manage users/roles
+            "roles": PERMISSIONS.role_names() if permissions & {"users:write", "roles:read"} else [],
+        },
+        headers=headers,
+    )
+
+# ===== User listing =====
+@app.get("/api/users", response_model=schemas.UserPage)
+async def list_users(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = Query("id", pattern="^(id|username)$"),
+    prefix: Optional[str] = Query(None, max_length=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("users:read")),
+):
     try:
-        payload = decode_token(access_token)
-        username = payload.get("sub")
-        role = payload.get("role")
-        return {"username": username, "role": role}
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        items, next_cursor = await crud.list_users_async(db, limit, cursor, sort, prefix)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/api/users/search", response_model=schemas.UserSearchResult)
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+    role: Optional[str] = Query(None, max_length=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("users:read")),
+):
+    """
+    Typeahead: exact, then prefix, then substring matches on username.
+    Queries under 3 characters only match prefixes.
+    """
+    if search.USER_INDEX.ready:
+        return {"items": search.USER_INDEX.search(q, limit, role), "source": "index"}
+    return {"items": await crud.search_users_like_async(db, q, limit, role), "source": "database"}
+
+@app.get("/api/users/export")
+async def export_users(
+    sort: str = Query("id", pattern="^(id|username)$"),
+    prefix: Optional[str] = Query(None, max_length=50),
+    current_user: dict = Depends(require_permission("users:read")),
+):
+    """NDJSON export, streamed chunk by chunk so memory stays flat for big tables."""
+    async def ndjson():
+        # Own session: it must stay open for the whole stream
+        async with AsyncSessionLocal() as db:
+            async for row in crud.iter_users_async(db, sort=sort, prefix=prefix):
+                yield json.dumps(row) + "\n"
+
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=users.ndjson"},
+    )
+
+# ===== Bulk user import =====
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024  # bigger uploads spill to a temp file
+
+@app.post("/api/users/import")
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    batch_size: int = Query(bulk_import.DEFAULT_BATCH_SIZE, ge=1, le=5000),
+    current_user: dict = Depends(require_permission("users:write")),
+):
+    """
+    Upload CSV (username,password,role header) or NDJSON as the request body.
+    Streams back one NDJSON result line per input row.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+
+    # Read the whole upload first; the response stream can't share the receive channel
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+
+    async def report():
+        try:
+            text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+            async with AsyncSessionLocal() as db:
+                async for result in bulk_import.import_users(db, bulk_import.iter_rows(text, fmt), batch_size):
+                    yield json.dumps(result) + "\n"
+        finally:
+            spool.close()
+
+    return StreamingResponse(report(), media_type="application/x-ndjson")
+
+# ===== Roles & Permissions =====
+@app.get("/api/roles", response_model=List[schemas.Role])
+async def list_roles(
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("roles:read")),
+):
+    return [crud.role_to_dict(role) for role in await crud.get_roles_async(db)]
+
+@app.post("/api/roles", response_model=schemas.Role)
+async def create_role(
+    role: schemas.RoleCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("roles:write")),
+):
+    try:
+        db_role = await crud.create_role_async(db, role, modified_by=current_user.get("sub"))
+    except crud.RoleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    PERMISSIONS.invalidate()
+    return crud.role_to_dict(db_role)
+
+@app.put("/api/roles/{role_id}", response_model=schemas.Role)
+async def update_role(
+    role_id: int,
+    role: schemas.RoleUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("roles:write")),
+):
+    try:
+        db_role = await crud.update_role_async(db, role_id, role, modified_by=current_user.get("sub"))
+    except crud.RoleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not db_role:
+        raise HTTPException(status_code=404, detail="Role not found")
+    PERMISSIONS.invalidate()
+    return crud.role_to_dict(db_role)
+
+@app.delete("/api/roles/{role_id}")
+async def delete_role(
+    role_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("roles:write")),
+):
+    try:
+        db_role = await crud.delete_role_async(db, role_id)
+    except crud.RoleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not db_role:
+        raise HTTPException(status_code=404, detail="Role not found")
+    PERMISSIONS.invalidate()
+    return {"msg": "Role deleted"}
+
+@app.get("/api/permissions", response_model=List[schemas.Permission])
+async def list_permissions(
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("roles:read")),
+):
+    return await crud.get_permissions_async(db)
+
+@app.post("/api/permissions", response_model=schemas.Permission)
+async def create_permission(
+    permission: schemas.PermissionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("roles:write")),
+):
+    try:
+        return await crud.create_permission_async(db, permission)
+    except crud.RoleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# ===== Time logs =====
+MAX_RANGE_DAYS = 366
+PERIOD_PATTERN = r"^\d{4}(-(0[1-9]|1[0-2]))?$"  # "2026" or "2026-01".."2026-12"
+
+def check_date_range(start: date, end: date):
+    if end < start or (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must be 0-{MAX_RANGE_DAYS} days")
+
+@app.post("/api/timelogs", response_model=List[schemas.TimeLog])
+async def submit_time_logs(
+    batch: schemas.TimeLogBatch,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    return await crud.create_time_logs_async(db, user_id, batch.entries)
+
+@app.get("/api/timelogs", response_model=List[schemas.TimeLog])
+async def list_time_logs(
+    start: date,
+    end: date,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    check_date_range(start, end)
+    return await crud.get_time_logs_async(db, user_id, start, end)
+
+@app.put("/api/timelogs/{log_id}", response_model=schemas.TimeLog)
+async def update_time_log(
+    log_id: int,
+    entry: schemas.TimeLogCreate,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    log = await crud.update_time_log_async(db, user_id, log_id, entry)
+    if not log:
+        raise HTTPException(status_code=404, detail="Time log not found")
+    return log
+
+@app.delete("/api/timelogs/{log_id}")
+async def delete_time_log(
+    log_id: int,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    if not await crud.delete_time_log_async(db, user_id, log_id):
+        raise HTTPException(status_code=404, detail="Time log not found")
+    return {"msg": "Time log deleted"}
+
+# ===== Applications =====
+@app.post("/api/applications", response_model=schemas.Application)
+async def submit_application(
+    application: schemas.ApplicationCreate,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    try:
+        return await crud.create_application_async(db, user_id, application)
+    except crud.ApplicationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/applications", response_model=List[schemas.Application])
+async def list_my_applications(
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    return await crud.get_applications_async(db, user_id, status, kind, start, end, limit)
+
+@app.get("/api/applications/pending", response_model=List[schemas.Application])
+async def list_pending_applications(
+    kind: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("applications:approve")),
+):
+    return await crud.get_applications_async(db, status="pending", kind=kind, limit=limit)
+
+@app.put("/api/applications/{application_id}/decision", response_model=schemas.Application)
+async def decide_application(
+    application_id: int,
+    decision: schemas.ApplicationDecision,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("applications:approve")),
+):
+    application = await crud.decide_application_async(
+        db, application_id, decision.status, current_user.get("sub")
+    )
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return application
+
+# ===== Period summaries =====
+@app.get("/api/summary", response_model=schemas.PeriodSummary)
+async def my_summary(
+    period: Optional[str] = Query(None, pattern=PERIOD_PATTERN),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    return await crud.get_period_summary_async(db, user_id, period or date.today().strftime("%Y-%m"))
+
+@app.get("/api/summary/team", response_model=List[schemas.PeriodSummary])
+async def team_summary(
+    period: str = Query(..., pattern=PERIOD_PATTERN),
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(require_permission("applications:approve")),
+):
+    return await crud.get_team_summaries_async(db, period, after, limit)
+
+# ===== Metrics (Prometheus text format) =====
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 # ===== Run server =====
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+# bench/auth_overhead.py
+"""
+Per-request auth cost: full JWT verify (old per-route decode_token) vs the
+verified-token cache used by get_current_user.
+
+    python -m bench.auth_overhead --iterations 200000
+"""
+import argparse
+import time
+import timeit
+
+import jwt
+
+from backend.auth import RevokedTokens, VerifiedTokenCache, token_digest
+
+SECRET_KEY = "change_this_secret_in_production"
+ALGORITHM = "HS256"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    payload = {"sub": "admin1", "role": "admin", "iat": int(time.time()), "exp": int(time.time()) + 3600}
+    token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    cache = VerifiedTokenCache()
+    revoked = RevokedTokens()
+
+    def before():
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    def after():
+        digest = token_digest(token)
+        if revoked.is_revoked(digest):
+            raise RuntimeError("revoked")
+        cached = cache.get(digest)
+        if cached is not None:
+            return cached
+        verified = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        cache.put(digest, verified)
+        return verified
+
+    for name, fn in (("jwt.decode per request", before), ("verified-token cache", after)):
+        seconds = timeit.timeit(fn, number=args.iterations)
+        print(f"{name:<24} {seconds / args.iterations * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
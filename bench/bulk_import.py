@@ -0,0 +1,95 @@
+# bench/bulk_import.py
+"""
+Bulk import throughput, and what it does to logins that share the hashing pool.
+
+Imports --users generated rows through backend.bulk_import while a probe calls
+verify_password every --probe-interval seconds, then prints users/minute and the
+verify latency with the pool idle vs during the import.
+
+    python -m bench.bulk_import --users 5000
+    BCRYPT_ROUNDS=12 python -m bench.bulk_import --users 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="seconds between login verifies")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="used unless BCRYPT_ROUNDS is set")
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "import_bench.db")
+os.environ.setdefault("BCRYPT_ROUNDS", str(args.bcrypt_rounds))
+
+from backend import bulk_import, crud, migrate  # noqa: E402
+from backend.database import AsyncSessionLocal, dispose_engines, get_engine  # noqa: E402
+
+
+def summary(latencies):
+    if not latencies:
+        return "no samples"
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (f"n={len(ordered):<5} p50={statistics.median(ordered) * 1e3:8.1f} ms  "
+            f"p95={p95 * 1e3:8.1f} ms  max={ordered[-1] * 1e3:8.1f} ms")
+
+
+async def probe(hashed: str, stop: asyncio.Event, latencies: list, busy: list):
+    """One login-style verify every interval until `stop` is set."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await crud.verify_password("probe-password", hashed)
+            latencies.append(time.perf_counter() - start)
+        except crud.PasswordHasherBusy:
+            busy.append(1)
+        await asyncio.sleep(args.probe_interval)
+
+
+async def main():
+    migrate.migrate(get_engine())
+    hashed = await crud.hash_password("probe-password")
+
+    idle, busy = [], []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(hashed, stop, idle, busy))
+    await asyncio.sleep(max(1.0, args.probe_interval * 20))
+    stop.set()
+    await task
+
+    rows = ({"username": f"import{i}", "password": f"pw{i}"} for i in range(args.users))
+    during = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(hashed, stop, during, busy))
+    counts = {}
+    start = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            async for result in bulk_import.import_users(db, rows, args.batch_size):
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        await task
+        crud.shutdown_hash_executor()
+        await dispose_engines()
+
+    print(f"BCRYPT_ROUNDS={crud.BCRYPT_ROUNDS} workers={crud.PASSWORD_HASH_WORKERS} "
+          f"bulk jobs={crud.PASSWORD_HASH_BULK_JOBS} batch={args.batch_size}")
+    print(f"import: {counts} in {elapsed:.1f}s = {args.users / elapsed * 60:,.0f} users/minute")
+    print(f"verify, pool idle:      {summary(idle)}")
+    print(f"verify, during import:  {summary(during)}")
+    print(f"verify rejected (503):  {len(busy)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+# bench/captcha_stress.py
+"""
+Captcha store stress run: issue millions of captchas (most never validated)
+and show that entry count and memory stay flat once the cap is reached.
+
+    python -m bench.captcha_stress --store memory --requests 2000000
+    python -m bench.captcha_stress --store sqlite --requests 200000
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from backend.captcha_store import MemoryCaptchaStore, SqliteCaptchaStore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--requests", type=int, default=2_000_000)
+    parser.add_argument("--max-entries", type=int, default=100_000)
+    parser.add_argument("--ttl", type=float, default=300)
+    parser.add_argument("--validate-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.store == "sqlite":
+        path = os.path.join(tempfile.mkdtemp(), "captcha_stress.db")
+        store = SqliteCaptchaStore(path, max_entries=args.max_entries)
+    else:
+        store = MemoryCaptchaStore(max_entries=args.max_entries)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    report_every = max(args.requests // 10, 1)
+    # Simulated clock so expiry/sweeps happen without waiting in real time
+    now = time.time()
+
+    for i in range(1, args.requests + 1):
+        now += 0.001
+        word = "".join(random.choices(string.ascii_uppercase + string.digits, k=5))
+        cid = str(uuid.uuid4())
+        store.put(cid, word, now + args.ttl)
+        if random.random() < args.validate_ratio:
+            store.pop(cid)
+        if i % 10_000 == 0:
+            store.sweep(now)
+        if i % report_every == 0:
+            current, peak = tracemalloc.get_traced_memory()
+            db_size = ""
+            if args.store == "sqlite":
+                db_size = f"  db={os.path.getsize(path) / 1e6:8.1f} MB"
+            print(
+                f"{i:>10} requests  entries={len(store):>8}  "
+                f"mem={current / 1e6:8.1f} MB  peak={peak / 1e6:8.1f} MB{db_size}  "
+                f"{i / (time.perf_counter() - start):10.0f} req/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
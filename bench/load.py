@@ -0,0 +1,303 @@
+# bench/load.py
+"""
+Load test for the auth API: the FastAPI app runs in-process (ASGI transport,
+lifespan included) against a fresh SQLite DB, and virtual users drive a weighted
+mix of captcha / login / register / dashboard / bootstrap / static requests.
+
+    pip install -r requirements-dev.txt   # httpx
+    python -m bench.load run --mix auth --concurrency 16 --duration 10 --output current.json
+    python -m bench.load compare baseline.json current.json --threshold 0.15
+
+`compare` exits 1 when an endpoint's throughput drops, or its p95 grows, by more
+than the threshold, or when its error rate goes up.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+MIXES = {
+    # A login page + dashboard day: mostly authenticated reads and static files
+    "auth": {"captcha": 20, "login": 15, "register": 5, "dashboard": 20, "bootstrap": 20, "static": 20},
+    "login": {"login": 1},
+    "browse": {"dashboard": 30, "bootstrap": 30, "static": 40},
+}
+STATIC_PATHS = [
+    "/modules/login/login.css",
+    "/modules/login/login.js",
+    "/modules/dashboard/dashboard.css",
+    "/modules/dashboard/dashboard.js",
+    "/modules/dashboard/logo.png",
+]
+PASSWORD = "bench-password"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+# ===========================
+# Virtual users
+# ===========================
+class Recorder:
+    def __init__(self):
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    async def request(self, client, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except Exception as e:
+            response, status = None, type(e).__name__
+        if self.recording:
+            self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+            counts = self.statuses.setdefault(name, {})
+            counts[status] = counts.get(status, 0) + 1
+        return response
+
+
+class VirtualUser:
+    def __init__(self, index: int, client, recorder: Recorder, rng: random.Random):
+        self.index = index
+        self.client = client
+        self.rec = recorder
+        self.rng = rng
+        self.username = f"bench{index}"
+        self.registered = 0
+        self.bootstrap_etag = None
+
+    async def captcha(self):
+        response = await self.rec.request(self.client, "captcha", "GET", "/api/captcha")
+        return response.json() if response is not None and response.status_code == 200 else None
+
+    async def login(self):
+        captcha = await self.captcha()
+        if captcha is None:
+            return
+        await self.rec.request(self.client, "login", "POST", "/api/login", json={
+            "username": self.username, "password": PASSWORD,
+            "captcha": captcha["word"], "captcha_id": captcha["id"],
+        })
+
+    async def register(self):
+        self.registered += 1
+        await self.rec.request(self.client, "register", "POST", "/api/register", json={
+            "username": f"bench{self.index}-{self.registered}-{self.rng.getrandbits(32):x}",
+            "password": PASSWORD,
+        })
+
+    async def dashboard(self):
+        await self.rec.request(self.client, "dashboard", "GET", "/api/dashboard")
+
+    async def bootstrap(self):
+        # Revalidate like a browser does: 304 once the ETag is known
+        headers = {"If-None-Match": self.bootstrap_etag} if self.bootstrap_etag else {}
+        response = await self.rec.request(self.client, "bootstrap", "GET", "/api/bootstrap", headers=headers)
+        if response is not None and response.status_code == 200:
+            self.bootstrap_etag = response.headers.get("etag")
+
+    async def static(self):
+        await self.rec.request(self.client, "static", "GET", self.rng.choice(STATIC_PATHS),
+                               headers={"Accept-Encoding": "gzip"})
+
+    async def run(self, mix: Dict[str, int], deadline: float):
+        names = list(mix)
+        weights = [mix[n] for n in names]
+        while time.perf_counter() < deadline:
+            await getattr(self, self.rng.choices(names, weights)[0])()
+
+
+# ===========================
+# run
+# ===========================
+async def run_load(mix_name: str, concurrency: int, duration: float, warmup: float, seed: int) -> dict:
+    import httpx
+
+    from backend.server import app
+
+    mix = MIXES[mix_name]
+    recorder = Recorder()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        clients = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(concurrency)]
+        users = [VirtualUser(i, c, recorder, random.Random(seed + i)) for i, c in enumerate(clients)]
+        try:
+            # Every virtual user has an account and a session cookie before timing starts
+            # One at a time: concurrent logins past the hashing pool's queue cap would get 503
+            # (PASSWORD_HASH_MAX_PENDING) and leave those users browsing without a session
+            for user in users:
+                await user.client.post("/api/register", json={"username": user.username, "password": PASSWORD})
+                await user.login()
+
+            await asyncio.gather(*(u.run(mix, time.perf_counter() + warmup) for u in users))
+            recorder.recording = True
+            start = time.perf_counter()
+            await asyncio.gather(*(u.run(mix, start + duration) for u in users))
+            elapsed = time.perf_counter() - start
+        finally:
+            for client in clients:
+                await client.aclose()
+
+    def summarize(latencies: List[float], statuses: Dict[str, int]) -> dict:
+        count = len(latencies)
+        errors = sum(n for s, n in statuses.items() if not (s.isdigit() and int(s) < 400))
+        return {
+            "count": count,
+            "rps": round(count / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1e3, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1e3, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1e3, 3),
+            "mean_ms": round(sum(latencies) / count * 1e3, 3) if count else 0.0,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "statuses": dict(sorted(statuses.items())),
+        }
+
+    endpoints = {
+        name: summarize(recorder.latencies[name], recorder.statuses[name]) for name in sorted(recorder.latencies)
+    }
+    all_statuses: Dict[str, int] = {}
+    for counts in recorder.statuses.values():
+        for status, n in counts.items():
+            all_statuses[status] = all_statuses.get(status, 0) + n
+    total = summarize([x for v in recorder.latencies.values() for x in v], all_statuses)
+
+    return {
+        "meta": {
+            "mix": mix_name,
+            "concurrency": concurrency,
+            "duration_s": duration,
+            "warmup_s": warmup,
+            "seed": seed,
+            "bcrypt_rounds": int(os.environ["BCRYPT_ROUNDS"]),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "total": total,
+        "endpoints": endpoints,
+    }
+
+
+def print_results(results: dict):
+    meta = results["meta"]
+    print(f"mix={meta['mix']} concurrency={meta['concurrency']} duration={meta['duration_s']}s "
+          f"bcrypt_rounds={meta['bcrypt_rounds']} git={meta['git'] or '?'}")
+    print(f"{'endpoint':<12} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+    for name, r in rows:
+        print(f"{name:<12} {r['count']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['error_rate']:>7.1%}")
+
+
+def cmd_run(args):
+    tmp = tempfile.TemporaryDirectory()
+    # Must be set before backend is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}/bench.db"
+    os.environ["CAPTCHA_DB_PATH"] = f"{tmp.name}/captcha.db"
+    os.environ.setdefault("BCRYPT_ROUNDS", str(args.bcrypt_rounds))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ASSET_WATCH", "0")
+    # Every virtual user shares one client IP; the login limiter would throttle the run
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+    results = asyncio.run(run_load(args.mix, args.concurrency, args.duration, args.warmup, args.seed))
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {args.output}")
+    tmp.cleanup()
+
+
+# ===========================
+# compare
+# ===========================
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    for key in ("mix", "concurrency", "bcrypt_rounds", "cpus"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)}), "
+                  "numbers may not be comparable")
+
+    print(f"{'endpoint':<12} {'req/s base':>10} {'req/s now':>10} {'p95 base':>9} {'p95 now':>9}  verdict")
+    regressions = 0
+    rows = [(n, baseline["endpoints"][n], current["endpoints"].get(n)) for n in baseline["endpoints"]]
+    rows.append(("TOTAL", baseline["total"], current["total"]))
+    for name, base, now in rows:
+        if now is None:
+            print(f"{name:<12} missing from current run")
+            regressions += 1
+            continue
+        problems = []
+        if base["rps"] and now["rps"] < base["rps"] * (1 - args.threshold):
+            problems.append(f"throughput {now['rps'] / base['rps'] - 1:+.0%}")
+        if base["p95_ms"] and now["p95_ms"] > base["p95_ms"] * (1 + args.threshold):
+            problems.append(f"p95 {now['p95_ms'] / base['p95_ms'] - 1:+.0%}")
+        if now["error_rate"] > base["error_rate"] + args.max_error_increase:
+            problems.append(f"errors {base['error_rate']:.1%} -> {now['error_rate']:.1%}")
+        regressions += bool(problems)
+        print(f"{name:<12} {base['rps']:>10.1f} {now['rps']:>10.1f} {base['p95_ms']:>9.2f} {now['p95_ms']:>9.2f}  "
+              + ("REGRESSION: " + ", ".join(problems) if problems else "ok"))
+
+    if regressions:
+        print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test for the auth API")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run a load mix and report throughput / latency")
+    run.add_argument("--mix", choices=sorted(MIXES), default="auth")
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    run.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--bcrypt-rounds", type=int, default=4,
+                     help="used unless BCRYPT_ROUNDS is set; production cost makes login dominate")
+    run.add_argument("--output", help="write results JSON here")
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser("compare", help="compare a results JSON against a saved baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.15,
+                         help="allowed throughput drop / p95 growth (fraction)")
+    compare.add_argument("--max-error-increase", type=float, default=0.01)
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
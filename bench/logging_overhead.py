@@ -0,0 +1,105 @@
+# bench/logging_overhead.py
+"""
+Request latency with debug logging off, on and written synchronously, and on
+through the log queue. Each mode runs in its own interpreter against a fresh
+SQLite DB; the app is driven in-process over ASGI and log output goes to a
+temp file. The mix is captcha + failed logins (unknown user), so bcrypt does
+not drown out the logging cost.
+
+    python -m bench.logging_overhead --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    "debug off (INFO)": {"LOG_LEVEL": "INFO"},
+    "debug, sync handler": {"LOG_LEVEL": "DEBUG", "LOG_ASYNC": "0"},
+    "debug, queue handler": {"LOG_LEVEL": "DEBUG", "LOG_ASYNC": "1"},
+    "debug, queue, 1% auth": {"LOG_LEVEL": "DEBUG", "LOG_ASYNC": "1", "LOG_SAMPLING": "backend.server.auth=0.01"},
+}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run_worker(total: int, concurrency: int) -> dict:
+    import httpx
+
+    from backend.server import app
+
+    async with app.router.lifespan_context(app):
+        logging.getLogger("httpx").setLevel(logging.WARNING)  # the bench client, not the app
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            latencies = []
+            remaining = iter(range(total))
+
+            async def one_user():
+                for i in remaining:
+                    start = time.perf_counter()
+                    if i % 2:
+                        r = await client.get("/api/captcha")
+                    else:
+                        r = await client.post("/api/login", json={
+                            "username": f"ghost{i}", "password": "x", "captcha": "ADMIN",
+                        })
+                    latencies.append(time.perf_counter() - start)
+                    assert r.status_code in (200, 401), r.text
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one_user() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+    return {
+        "rps": total / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": statistics.fmean(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_worker(args.requests, args.concurrency))))
+        return
+
+    print(f"{'mode':<24} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'log lines':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for index, (name, overrides) in enumerate(MODES.items()):
+            env = dict(os.environ, LOG_FORMAT="json", RATE_LIMIT_ENABLED="0",
+                       DATABASE_URL=f"sqlite:///{tmp}/bench{index}.db", **overrides)
+            log_path = os.path.join(tmp, f"log{index}.txt")
+            with open(log_path, "w") as log_file:
+                proc = subprocess.run(
+                    [sys.executable, "-m", "bench.logging_overhead", "--worker",
+                     "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+                    env=env, stdout=subprocess.PIPE, stderr=log_file, text=True,
+                )
+            if proc.returncode != 0:
+                with open(log_path) as f:
+                    sys.exit(f"{name} failed:\n{f.read()[-2000:]}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            with open(log_path) as f:
+                lines = sum(1 for _ in f)
+            print(f"{name:<24} {result['rps']:8.0f} {result['p50'] * 1e3:8.2f} "
+                  f"{result['p95'] * 1e3:8.2f} {result['p99'] * 1e3:8.2f} {lines:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# bench/static_assets.py
+"""
+Requests/sec for the login page and its assets: the old StaticFiles/FileResponse
+setup vs the hashed in-memory asset pipeline (in-process, ASGI transport).
+
+    python -m bench.static_assets --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "static_bench.db"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import FileResponse  # noqa: E402
+from fastapi.staticfiles import StaticFiles  # noqa: E402
+
+from backend import server  # noqa: E402
+
+PAGE_ASSETS = ["/", "/modules/login/login.css", "/modules/login/login.js"]
+
+
+def old_app() -> FastAPI:
+    """The previous setup: StaticFiles mount + FileResponse from disk."""
+    app = FastAPI()
+    app.mount("/modules", StaticFiles(directory=server.MODULES_DIR), name="modules")
+
+    @app.get("/")
+    async def root():
+        return FileResponse(os.path.join(server.MODULES_DIR, "login", "login.html"))
+
+    return app
+
+
+async def run(app, total: int, concurrency: int, headers_for=None):
+    transport = httpx.ASGITransport(app=app)
+    sent = 0
+    transferred = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal sent, transferred
+            while sent < total:
+                sent += 1
+                path = PAGE_ASSETS[sent % len(PAGE_ASSETS)]
+                headers = {"accept-encoding": "gzip"}
+                if headers_for:
+                    headers.update(headers_for.get(path, {}))
+                r = await client.get(path, headers=headers)
+                assert r.status_code in (200, 304), (path, r.status_code)
+                transferred += len(r.content) if r.headers.get("content-encoding") != "gzip" else int(
+                    r.headers.get("content-length", 0)
+                )
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return total / elapsed, transferred / total
+
+
+async def etags(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        result = {}
+        for path in PAGE_ASSETS:
+            r = await client.get(path, headers={"accept-encoding": "gzip"})
+            if "etag" in r.headers:
+                result[path] = {"if-none-match": r.headers["etag"]}
+        return result
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    before, after = old_app(), server.app
+    for name, app in (("before: StaticFiles + FileResponse", before), ("after: hashed in-memory assets", after)):
+        rps, size = await run(app, args.requests, args.concurrency)
+        print(f"{name:<40} full GET     {rps:8.0f} req/s  {size:8.0f} bytes/response")
+        rps, size = await run(app, args.requests, args.concurrency, await etags(app))
+        print(f"{name:<40} revalidation {rps:8.0f} req/s  {size:8.0f} bytes/response")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+# bench/timelog_rollup.py
+"""
+Seed a year of time logs for many users, then compare month views served from
+period_summaries with the same numbers aggregated from raw time_logs.
+
+    python -m bench.timelog_rollup --users 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, time as dtime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--database-url", default=None, help="defaults to a temp SQLite file")
+    return parser.parse_args()
+
+
+args = parse_args()
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "timelog_bench.db")
+
+from sqlalchemy import func, select  # noqa: E402
+
+from backend import crud, models, schemas  # noqa: E402
+from backend import migrate  # noqa: E402
+from backend.database import AsyncSessionLocal, dispose_engines, get_engine  # noqa: E402
+
+
+def workdays(year: int):
+    day = date(year, 1, 1)
+    while day.year == year:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+async def seed(user_ids, year):
+    days = list(workdays(year))
+    start = time.perf_counter()
+    rows = 0
+    async with AsyncSessionLocal() as db:
+        for user_id in user_ids:
+            # One batch request per user-month, like the apply page would send
+            month_batches = {}
+            for day in days:
+                entry = schemas.TimeLogCreate(
+                    work_date=day,
+                    time_in=dtime(8, random.randint(0, 30)),
+                    time_out=dtime(17, random.randint(0, 59)),
+                )
+                month_batches.setdefault(day.month, []).append(entry)
+            for entries in month_batches.values():
+                await crud.create_time_logs_async(db, user_id, entries)
+                rows += len(entries)
+    elapsed = time.perf_counter() - start
+    print(f"seeded {rows} time logs in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+
+
+def report(name, samples):
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<40} p50={statistics.median(samples) * 1e3:8.3f} ms  p95={p95 * 1e3:8.3f} ms")
+
+
+async def compare(user_ids, year, n):
+    async with AsyncSessionLocal() as db:
+        rollup, raw = [], []
+        for _ in range(n):
+            user_id = random.choice(user_ids)
+            month = random.randint(1, 12)
+            period = f"{year}-{month:02d}"
+
+            t = time.perf_counter()
+            summary = await crud.get_period_summary_async(db, user_id, period)
+            rollup.append(time.perf_counter() - t)
+
+            t = time.perf_counter()
+            first = date(year, month, 1)
+            last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+            result = await db.execute(
+                select(func.sum(models.TimeLog.minutes_worked), func.count())
+                .where(
+                    models.TimeLog.user_id == user_id,
+                    models.TimeLog.work_date >= first,
+                    models.TimeLog.work_date <= last,
+                )
+            )
+            minutes, count = result.one()
+            raw.append(time.perf_counter() - t)
+            assert (minutes, count) == (summary["minutes_worked"], summary["time_log_count"])
+        report("user month view: period_summaries", rollup)
+        report("user month view: SUM over time_logs", raw)
+
+        team_rollup, team_raw = [], []
+        for _ in range(max(n // 20, 5)):
+            month = random.randint(1, 12)
+            t = time.perf_counter()
+            await crud.get_team_summaries_async(db, f"{year}-{month:02d}", limit=100)
+            team_rollup.append(time.perf_counter() - t)
+
+            t = time.perf_counter()
+            first = date(year, month, 1)
+            last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+            await db.execute(
+                select(models.TimeLog.user_id, func.sum(models.TimeLog.minutes_worked))
+                .where(models.TimeLog.work_date >= first, models.TimeLog.work_date <= last)
+                .group_by(models.TimeLog.user_id)
+                .order_by(models.TimeLog.user_id)
+                .limit(100)
+            )
+            team_raw.append(time.perf_counter() - t)
+        report("approver page (100 users): summaries", team_rollup)
+        report("approver page (100 users): GROUP BY", team_raw)
+
+
+async def main():
+    engine = get_engine()
+    migrate.migrate(engine)
+    with engine.begin() as conn:
+        result = conn.execute(
+            models.User.__table__.insert().returning(models.User.id),
+            [{"username": f"bench{i}", "hashed_password": "x", "role": "user"} for i in range(args.users)],
+        )
+        user_ids = [row[0] for row in result]
+    try:
+        await seed(user_ids, args.year)
+        await compare(user_ids, args.year, args.samples)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+# bench/user_search.py
+"""
+User search: in-memory index vs LIKE '%q%' on a SQLite users table.
+
+    python -m bench.user_search --users 1000000 --queries 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--users", type=int, default=1_000_000)
+parser.add_argument("--queries", type=int, default=2000)
+parser.add_argument("--like-queries", type=int, default=20)
+args = parser.parse_args()
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}/search.db"
+
+from backend import crud, migrate, models  # noqa: E402
+from backend.database import AsyncSessionLocal, dispose_engines, get_engine  # noqa: E402
+from backend.search import UserSearchIndex, build_index  # noqa: E402
+
+FIRST = ["juan", "maria", "jose", "ana", "mark", "grace", "paolo", "kristine", "john", "angel",
+         "miguel", "andrea", "carlo", "bea", "rafael", "joy", "nico", "camille", "jerome", "liza"]
+LAST = ["santos", "reyes", "cruz", "bautista", "ocampo", "garcia", "mendoza", "torres", "tomas",
+        "andrada", "castillo", "villanueva", "ramos", "aquino", "navarro", "delacruz", "flores"]
+
+
+def fmt(samples):
+    samples = sorted(samples)
+    p = lambda pct: samples[min(len(samples) - 1, int(len(samples) * pct / 100))] * 1e6  # noqa: E731
+    return f"p50={p(50):9.1f} us  p99={p(99):9.1f} us  mean={statistics.fmean(samples) * 1e6:9.1f} us"
+
+
+def seed(n):
+    rng = random.Random(7)
+    engine = get_engine()
+    migrate.migrate(engine)
+    names = set()
+    while len(names) < n:
+        names.add(f"{rng.choice(FIRST)}.{rng.choice(LAST)}{rng.randint(1, 99999)}")
+    names = list(names)
+    with engine.begin() as conn:
+        conn.execute(
+            models.User.__table__.insert(),
+            [{"username": u, "hashed_password": "x", "role": "admin" if i % 50 == 0 else "user"}
+             for i, u in enumerate(names)],
+        )
+    return names
+
+
+def make_queries(names, n):
+    rng = random.Random(11)
+    queries = []
+    for _ in range(n):
+        name = rng.choice(names)
+        kind = rng.random()
+        if kind < 0.4:  # typing a prefix
+            queries.append(name[:rng.randint(1, 6)])
+        elif kind < 0.8:  # a surname / fragment from the middle
+            start = rng.randint(0, max(0, len(name) - 4))
+            queries.append(name[start:start + rng.randint(3, 8)])
+        else:  # exact, or nothing matches
+            queries.append(name if kind < 0.9 else f"zz{rng.randint(0, 10**6)}q")
+    return queries
+
+
+async def main():
+    t = time.perf_counter()
+    names = seed(args.users)
+    print(f"seeded {len(names)} users in {time.perf_counter() - t:.1f}s")
+
+    index = UserSearchIndex()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await build_index(db, index)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"index build: {time.perf_counter() - t:.1f}s, ~{(rss_after - rss_before) / 1024:.0f} MB RSS growth")
+
+    queries = make_queries(names, args.queries)
+    timings, hits = [], 0
+    for q in queries:
+        start = time.perf_counter()
+        result = index.search(q, 10)
+        timings.append(time.perf_counter() - start)
+        hits += bool(result)
+    print(f"index  ({len(queries)} queries, {hits} with results): {fmt(timings)}")
+
+    # Incremental updates
+    t = time.perf_counter()
+    for i in range(1000):
+        index.add(10**9 + i, f"new.user{i}", "user")
+    print(f"index  add: {(time.perf_counter() - t) / 1000 * 1e6:.1f} us/user")
+
+    like_timings = []
+    async with AsyncSessionLocal() as db:
+        for q in queries[:args.like_queries]:
+            start = time.perf_counter()
+            await crud.search_users_like_async(db, q, 10)
+            like_timings.append(time.perf_counter() - start)
+    print(f"LIKE '%q%' ({len(like_timings)} queries): {fmt(like_timings)}")
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    tmp.cleanup()
+    sys.exit(0)
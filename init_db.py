@@ -5,8 +5,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
-from . import models, schemas, crud
-from .database import engine, SessionLocal
+from . import schemas, crud
+from .database import SessionLocal
 
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import JWTError, jwt
@@ -41,7 +41,7 @@ app.add_middleware(
 )
 
 # Create DB tables kung wala pa
-models.Base.metadata.create_all(bind=engine)
+# Tables are managed by `python -m backend.migrate` (no create_all at import)
 
 # Dependency for DB session
 def get_db():
@@ -74,8 +74,8 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db_user = crud.get_user_by_username(db, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    user.password = get_password_hash(user.password)
-    return crud.create_user(db=db, user=user)
+    # Hash once here; crud.create_user skips hashing when given the hash
+    return crud.create_user(db=db, user=user, hashed_password=get_password_hash(user.password))
 
 @app.post("/login")
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
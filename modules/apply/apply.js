@@ -1,8 +1,23 @@
 // apply.js
 document.addEventListener("DOMContentLoaded", () => {
 
+  // ---------- API helper ----------
+  async function api(path, method = "GET", body = null) {
+    const res = await fetch(path, {
+      method,
+      credentials: "include",
+      headers: body ? { "Content-Type": "application/json" } : {},
+      body: body ? JSON.stringify(body) : null,
+    });
+    const data = await res.json().catch(() => ({}));
+    if (!res.ok) throw new Error(data.detail || "Request failed");
+    return data;
+  }
+
+  const val = (id) => (document.getElementById(id)?.value || "").trim();
+
   // ---------- Generic modal helper ----------
-  function setupModal(modalId, openBtnId, closeBtnId, cancelBtnId, formId, message) {
+  function setupModal(modalId, openBtnId, closeBtnId, cancelBtnId, formId, message, buildPayload) {
     const modal = document.getElementById(modalId);
     const openBtn = openBtnId ? document.getElementById(openBtnId) : null;
     const closeBtn = closeBtnId ? document.getElementById(closeBtnId) : null;
@@ -30,21 +45,40 @@ document.addEventListener("DOMContentLoaded", () => {
 
     // form submit if provided
     if (form && message) {
-      form.addEventListener("submit", (e) => {
+      form.addEventListener("submit", async (e) => {
         e.preventDefault();
-        alert(message);
-        closeModal();
-        form.reset();
+        try {
+          if (buildPayload) await api("/api/applications", "POST", buildPayload());
+          alert(message);
+          closeModal();
+          form.reset();
+        } catch (err) {
+          alert(`❌ ${err.message}`);
+        }
       });
     }
   }
 
   // ---------- Initialize modals that use forms ----------
-  setupModal("leaveModal", "btn-leave", "closeLeaveModal", "cancelLeave", "leaveForm", "✅ Leave application submitted!");
-  setupModal("overtimeModal", "btn-overtime", "closeOvertimeModal", "cancelOvertime", "overtimeForm", "✅ Overtime application submitted!");
-  setupModal("workRestdayModal", "btn-work-restday", "closeWorkRestdayModal", "cancelWorkRestday", "workRestdayForm", "✅ Work on Rest Day application submitted!");
-  setupModal("workHolidayModal", "btn-work-holiday", "closeWorkHolidayModal", "cancelWorkHoliday", "workHolidayForm", "✅ Work on Holiday application submitted!");
-  setupModal("changeScheduleModal", "btn-change-schedule", "closeChangeScheduleModal", "cancelChangeSchedule", "changeScheduleForm", "✅ Change schedule request submitted!");
+  setupModal("leaveModal", "btn-leave", "closeLeaveModal", "cancelLeave", "leaveForm", "✅ Leave application submitted!", () => ({
+    kind: "leave", start_date: val("leaveFrom"), end_date: val("leaveTo"), leave_type: val("leaveType"), reason: val("leaveReason"),
+  }));
+  setupModal("overtimeModal", "btn-overtime", "closeOvertimeModal", "cancelOvertime", "overtimeForm", "✅ Overtime application submitted!", () => ({
+    kind: "overtime", start_date: val("otDate"),
+    minutes: (parseInt(val("otHours"), 10) || 0) * 60 + (parseInt(val("otMinutes"), 10) || 0),
+    offset: document.getElementById("otOffset")?.checked || false, reason: val("otReason"),
+  }));
+  setupModal("workRestdayModal", "btn-work-restday", "closeWorkRestdayModal", "cancelWorkRestday", "workRestdayForm", "✅ Work on Rest Day application submitted!", () => ({
+    kind: "work_restday", start_date: val("wrDate"), time_in: val("wrTimeIn"), time_out: val("wrTimeOut"), reason: val("wrReason"),
+  }));
+  setupModal("workHolidayModal", "btn-work-holiday", "closeWorkHolidayModal", "cancelWorkHoliday", "workHolidayForm", "✅ Work on Holiday application submitted!", () => ({
+    kind: "work_holiday", start_date: val("whDate"), time_in: val("whTimeIn"), time_out: val("whTimeOut"), reason: val("whReason"),
+  }));
+  setupModal("changeScheduleModal", "btn-change-schedule", "closeChangeScheduleModal", "cancelChangeSchedule", "changeScheduleForm", "✅ Change schedule request submitted!", () => ({
+    kind: "change_schedule", start_date: new Date().toISOString().slice(0, 10),
+    time_in: val("csCurrentIn"), time_out: val("csCurrentOut"),
+    requested_in: val("csRequestedIn"), requested_out: val("csRequestedOut"), reason: val("csReason"),
+  }));
 
   // TimeLog modal setup (main)
   setupModal("timeLogModal", "btn-timelog", "closeTimeLogModal", "cancelTimeLog", null, null);
@@ -52,9 +86,28 @@ document.addEventListener("DOMContentLoaded", () => {
   // TimeLog edit modal setup (add/edit)
   setupModal("timeLogEditModal", null, "closeTimeLogEditModal", "cancelTimeLogEdit", "timeLogForm", null);
 
-  // ---------- Time log management (in-memory) ----------
+  // ---------- Time log management (saved via /api/timelogs) ----------
   const timeLogs = []; // each: { id, date, in, out, reason }
 
+  const toTimeLog = (t) => ({
+    id: String(t.id), date: t.work_date, in: t.time_in.slice(0, 5), out: t.time_out.slice(0, 5), reason: t.reason,
+  });
+
+  // Load this month's logs
+  async function loadTimeLogs() {
+    const now = new Date();
+    const start = new Date(now.getFullYear(), now.getMonth(), 1);
+    const end = new Date(now.getFullYear(), now.getMonth() + 1, 0);
+    const fmt = (d) => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(d.getDate()).padStart(2, "0")}`;
+    try {
+      const logs = await api(`/api/timelogs?start=${fmt(start)}&end=${fmt(end)}`);
+      timeLogs.splice(0, timeLogs.length, ...logs.map(toTimeLog));
+    } catch (err) {
+      console.error(err);
+    }
+    renderTimeLogs();
+  }
+
   const timeLogListEl = document.getElementById("timeLogList");
   const emptyMsg = document.getElementById("emptyTimeLogMsg");
 
@@ -100,8 +153,13 @@ document.addEventListener("DOMContentLoaded", () => {
       delBtn.className = "btn";
       delBtn.style.background = "#ccc";
       delBtn.style.padding = "6px 10px";
-      delBtn.addEventListener("click", () => {
+      delBtn.addEventListener("click", async () => {
         if (confirm("Delete this time log?")) {
+          try {
+            await api(`/api/timelogs/${t.id}`, "DELETE");
+          } catch (err) {
+            return alert(`❌ ${err.message}`);
+          }
           const idx = timeLogs.findIndex((x) => x.id === t.id);
           if (idx >= 0) {
             timeLogs.splice(idx, 1);
@@ -157,28 +215,33 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 
   // Save (add or edit)
-  timeLogForm.addEventListener("submit", (e) => {
+  timeLogForm.addEventListener("submit", async (e) => {
     e.preventDefault();
     const id = inputTimeLogId.value;
-    const data = {
-      id: id || String(Date.now()),
-      date: inputTLDate.value,
-      in: inputTLIn.value,
-      out: inputTLOut.value,
+    const entry = {
+      work_date: inputTLDate.value,
+      time_in: inputTLIn.value,
+      time_out: inputTLOut.value,
       reason: inputTLReason.value,
     };
 
-    if (!data.date || !data.in || !data.out) {
+    if (!entry.work_date || !entry.time_in || !entry.time_out) {
       return alert("Please fill date, time in and time out.");
     }
 
-    if (id) {
-      // edit
-      const idx = timeLogs.findIndex((x) => x.id === id);
-      if (idx >= 0) timeLogs[idx] = data;
-    } else {
-      // add
-      timeLogs.push(data);
+    try {
+      if (id) {
+        // edit
+        const saved = toTimeLog(await api(`/api/timelogs/${id}`, "PUT", entry));
+        const idx = timeLogs.findIndex((x) => x.id === id);
+        if (idx >= 0) timeLogs[idx] = saved;
+      } else {
+        // add (batch endpoint, one entry)
+        const [saved] = await api("/api/timelogs", "POST", { entries: [entry] });
+        timeLogs.push(toTimeLog(saved));
+      }
+    } catch (err) {
+      return alert(`❌ ${err.message}`);
     }
 
     timeLogEditModal.style.display = "none";
@@ -186,8 +249,8 @@ document.addEventListener("DOMContentLoaded", () => {
     renderTimeLogs();
   });
 
-  // Initial render
-  renderTimeLogs();
+  // Initial load
+  loadTimeLogs();
 
   // Expose renderTimeLogs to window console for debugging (optional)
   window._renderTimeLogs = renderTimeLogs;
@@ -2,29 +2,27 @@
 // Dashboard.js - Dynamic Role-aware Sidebar with Accordion + Animations
 // =====================
 
-const modules = [
-  { name: "Dashboard", path: "/modules/dashboard/dashboard.html", roles: ["user", "admin"] },
-  {
-    name: "User Management",
-    path: "#",
-    roles: ["admin"],
-    children: [
-      { name: "User Manager", path: "/modules/usermanager/user-manager.html", roles: ["admin"] },
-      { name: "Role Manager", path: "/modules/role/role-manager.html", roles: ["admin"] }
-    ]
-  },
-  { name: "Reports", path: "/modules/reports/reports.html", roles: ["admin"] },
-  { name: "Settings", path: "/modules/settings/settings.html", roles: ["user", "admin"] }
-];
-
-function generateSidebar(role) {
+// Identity, role, menu and roles come from one /api/bootstrap call (shared by every page
+// that loads this script). The browser revalidates it with the ETag, so repeat loads are a 304.
+let bootstrapPromise = null;
+
+function getBootstrap() {
+  if (!bootstrapPromise) {
+    bootstrapPromise = fetch('/api/bootstrap', { credentials: 'include' }).then(res => {
+      if (!res.ok) throw new Error('Not authenticated');
+      return res.json();
+    });
+  }
+  return bootstrapPromise;
+}
+
+// `modules` is already filtered server-side for the user's permissions
+function generateSidebar(modules) {
   const sidebar = document.getElementById('sidebarMenu');
   if (!sidebar) return;
   sidebar.innerHTML = '';
 
   modules.forEach(item => {
-    if (!item.roles.includes(role)) return;
-
     const li = document.createElement('li');
     li.classList.add('menu-item');
 
@@ -45,7 +43,6 @@ function generateSidebar(role) {
       ul.style.flexDirection = 'column';
 
       item.children.forEach(child => {
-        if (!child.roles.includes(role)) return;
         const childLi = document.createElement('li');
         const childA = document.createElement('a');
         childA.href = child.path;
@@ -114,26 +111,20 @@ function generateSidebar(role) {
   });
 }
 
-// Fetch user info
-async function getUserInfo() {
+// Initialize dashboard
+document.addEventListener('DOMContentLoaded', async () => {
+  let boot;
   try {
-    const res = await fetch('/api/dashboard', { credentials: 'include' });
-    if (!res.ok) throw new Error('Not authenticated');
-    return await res.json();
+    boot = await getBootstrap();
   } catch (err) {
     console.error(err);
     window.location.href = '/modules/login/login.html';
+    return;
   }
-}
-
-// Initialize dashboard
-document.addEventListener('DOMContentLoaded', async () => {
-  const userInfo = await getUserInfo();
-  if (!userInfo) return;
 
   const usernameDisplay = document.getElementById('usernameDisplay');
   if (usernameDisplay) {
-    usernameDisplay.textContent = userInfo.username;
+    usernameDisplay.textContent = boot.user.username;
     usernameDisplay.style.opacity = '0';
     setTimeout(() => {
       usernameDisplay.style.transition = "opacity 0.6s ease";
@@ -141,7 +132,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     }, 100);
   }
 
-  generateSidebar(userInfo.role);
+  generateSidebar(boot.modules);
 
   const logoutBtn = document.getElementById('logoutBtn');
   if (logoutBtn) {
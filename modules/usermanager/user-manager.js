@@ -16,8 +16,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const usernameDisplay = document.getElementById('usernameDisplay');
     if (usernameDisplay) usernameDisplay.textContent = username;
 
-    // Generate dynamic sidebar from dashboard.js modules
-    if (typeof generateSidebar === "function") generateSidebar(role);
+    // Sidebar is built by dashboard.js from /api/bootstrap
 
     // Logout button
     const logoutBtn = document.getElementById('logoutBtn');
@@ -33,6 +32,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // 🔄 Load roles into select right after DOM ready
     loadRolesIntoSelect();
 
+    // 📄 Load first page of users from the server
+    loadUsersPage();
+
   } catch (err) {
     console.error(err);
     window.location.href = '/modules/login/login.html';
@@ -53,9 +55,15 @@ const roleSelect = document.getElementById('role'); // <select id="role">
 let editingRow = null;
 
 // ===== Load Roles into Dropdown =====
-function loadRolesIntoSelect() {
+async function loadRolesIntoSelect() {
   if (!roleSelect) return;
-  const roles = JSON.parse(localStorage.getItem("roles")) || [];
+  // Server roles from /api/bootstrap (dashboard.js); fall back to the local role list
+  let roles = [];
+  try {
+    roles = (await getBootstrap()).roles.map(name => ({ name }));
+  } catch (err) {
+    roles = JSON.parse(localStorage.getItem("roles")) || [];
+  }
 
   roleSelect.innerHTML = "";
 
@@ -81,6 +89,81 @@ document.addEventListener("rolesUpdated", () => {
   loadRolesIntoSelect();
 });
 
+// ===== Server-side user list (keyset pagination) =====
+const loadMoreUsersBtn = document.getElementById('loadMoreUsersBtn');
+let nextUsersCursor = null;
+
+async function loadUsersPage() {
+  const params = new URLSearchParams({ limit: '50' });
+  if (nextUsersCursor) params.set('cursor', nextUsersCursor);
+
+  try {
+    const res = await fetch(`/api/users?${params}`, { credentials: 'include' });
+    if (!res.ok) throw new Error('Failed to load users');
+    const page = await res.json();
+
+    page.items.forEach(renderUserRow);
+
+    nextUsersCursor = page.next_cursor;
+    if (loadMoreUsersBtn) loadMoreUsersBtn.style.display = nextUsersCursor ? 'inline-block' : 'none';
+    attachRowButtons();
+  } catch (err) {
+    console.error(err);
+  }
+}
+
+if (loadMoreUsersBtn) loadMoreUsersBtn.addEventListener('click', loadUsersPage);
+
+function renderUserRow(user) {
+  const row = document.createElement('tr');
+  row.innerHTML = `
+    <td>${user.id}</td>
+    <td></td>
+    <td></td>
+    <td></td>
+    <td><button class="edit-btn">Edit</button> <button class="delete-btn">Delete</button></td>
+  `;
+  row.children[1].textContent = user.username;
+  row.children[3].textContent = user.role;
+  userTable.appendChild(row);
+}
+
+// ===== Typeahead search (server-side index) =====
+const userSearchInput = document.getElementById('userSearch');
+let searchTimer = null;
+let searchSeq = 0;
+
+async function searchUsers(q) {
+  const seq = ++searchSeq;
+  userTable.innerHTML = '';
+  if (!q) {
+    // Back to the paged list
+    nextUsersCursor = null;
+    loadUsersPage();
+    return;
+  }
+  try {
+    const params = new URLSearchParams({ q, limit: '20' });
+    const res = await fetch(`/api/users/search?${params}`, { credentials: 'include' });
+    if (!res.ok) throw new Error('Search failed');
+    const result = await res.json();
+    if (seq !== searchSeq) return; // a newer keystroke already answered
+    userTable.innerHTML = '';
+    result.items.forEach(renderUserRow);
+    if (loadMoreUsersBtn) loadMoreUsersBtn.style.display = 'none';
+    attachRowButtons();
+  } catch (err) {
+    console.error(err);
+  }
+}
+
+if (userSearchInput) {
+  userSearchInput.addEventListener('input', () => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => searchUsers(userSearchInput.value.trim()), 150);
+  });
+}
+
 // ===== Modal Handling =====
 addUserBtn.addEventListener('click', () => {
   editingRow = null;